@@ -0,0 +1,227 @@
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import ahocorasick  # pyahocorasick, C implementation
+except ImportError:
+    ahocorasick = None
+
+
+# (keyword, log line, level name, time logged)
+Alert = Tuple[str, str, str, float]
+Deliver = Callable[[str, List[Alert]], None]
+
+
+class AhoCorasick:
+    """
+    All keywords in one automaton: a line is scanned once, whatever the number of keywords.
+    Matching is case insensitive and on substrings ("error" matches "errors").
+    Uses pyahocorasick when installed, a python trie with failure links otherwise.
+    """
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = sorted({keyword.lower() for keyword in keywords if keyword})
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for keyword in self.keywords:
+                self._automaton.add_word(keyword, keyword)
+            if self.keywords:
+                self._automaton.make_automaton()
+            return
+
+        self._automaton = None
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[Tuple[str, ...]] = [()]
+        for keyword in self.keywords:
+            node = 0
+            for char in keyword:
+                child = self.goto[node].get(char)
+                if child is None:
+                    child = self.goto[node][char] = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+                node = child
+            self.out[node] += (keyword,)
+
+        # failure link of a node = longest proper suffix of its path that is also in the trie
+        frontier = deque(self.goto[0].values())
+        while frontier:
+            node = frontier.popleft()
+            for char, child in self.goto[node].items():
+                frontier.append(child)
+                fail = self.fail[node]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[child] = self.goto[fail].get(char, 0)
+                self.out[child] += self.out[self.fail[child]]
+
+    def find(self, text: str) -> Set[str]:
+        """Keywords occurring in text."""
+        text = text.lower()
+        if self._automaton is not None:
+            return {keyword for _, keyword in self._automaton.iter(text)} if self.keywords else set()
+
+        goto, fail, out = self.goto, self.fail, self.out
+        found = set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+
+def print_alerts(user: str, alerts: List[Alert]) -> None:
+    for keyword, line, level, _ in alerts:
+        print(f"[alert -> {user}] '{keyword}' in {level}: {line}")
+
+
+class KeywordAlerter:
+    """
+    Keyword alerts for subscribed users, attached to Logger as a stage.
+
+    - on the logging thread: the line goes into a bounded queue (put_nowait, a full queue drops the
+      line and counts it in self.dropped), nothing else
+    - matcher thread: scans every line once against the automaton of all subscribed keywords and
+      groups the hits per user; a user gets one deliver(user, alerts) call per delivery_interval
+      (or as soon as max_batch alerts are pending) instead of one per match
+    - compiler thread: subscribe/unsubscribe only edit the subscription table, the automaton is
+      rebuilt off to the side and swapped in with a single assignment (double buffering), so
+      matching and logging never wait for a compilation
+    """
+    def __init__(self, deliver: Deliver = print_alerts, queue_size: int = 100_000,
+                 delivery_interval: float = 1.0, max_batch: int = 1000):
+        self.deliver = deliver
+        self.delivery_interval = delivery_interval
+        self.max_batch = max_batch
+        self.dropped = 0
+        self.subscriptions: Dict[str, Set[str]] = defaultdict(set)  # keyword -> users
+
+        self._lines = queue.Queue(maxsize=queue_size)
+        self._subscriptions_lock = threading.Lock()
+        self._compile_needed = threading.Condition(self._subscriptions_lock)
+        self._version = 0  # bumped by every subscription change
+        self._compiled_version = 0
+        # (automaton, keyword -> users) the matcher uses, replaced as a whole by the compiler
+        self._active: Tuple[AhoCorasick, Dict[str, Tuple[str, ...]]] = (AhoCorasick(()), {})
+        self._pending: Dict[str, List[Alert]] = defaultdict(list)
+        self._pending_count = 0
+        self._stopped = False
+
+        self._compiler = threading.Thread(target=self._run_compiler, name="KeywordAlerter-compiler", daemon=True)
+        self._matcher = threading.Thread(target=self._run_matcher, name="KeywordAlerter-matcher", daemon=True)
+        self._compiler.start()
+        self._matcher.start()
+
+    def attach(self, logger) -> "KeywordAlerter":
+        logger.add_stage(self)
+        return self
+
+    def subscribe(self, user: str, keywords: Iterable[str]) -> None:
+        with self._subscriptions_lock:
+            for keyword in keywords:
+                self.subscriptions[keyword.lower()].add(user)
+            self._version += 1
+            self._compile_needed.notify()
+
+    def unsubscribe(self, user: str, keywords: Optional[Iterable[str]] = None) -> None:
+        """Remove the user from the given keywords, from all of them when keywords is None."""
+        with self._subscriptions_lock:
+            for keyword in list(self.subscriptions) if keywords is None else [k.lower() for k in keywords]:
+                users = self.subscriptions.get(keyword)
+                if users is not None:
+                    users.discard(user)
+                    if not users:
+                        del self.subscriptions[keyword]
+            self._version += 1
+            self._compile_needed.notify()
+
+    def __call__(self, message: str, level_name: str) -> None:
+        """The Logger stage, runs on the logging thread."""
+        try:
+            self._lines.put_nowait((message, level_name, time.time()))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run_compiler(self) -> None:
+        compiled_version = 0
+        while True:
+            with self._subscriptions_lock:
+                while self._version == compiled_version and not self._stopped:
+                    self._compile_needed.wait()
+                if self._stopped:
+                    return
+                compiled_version = self._version
+                snapshot = {keyword: tuple(users) for keyword, users in self.subscriptions.items()}
+            # built without any lock held, the matcher keeps using the previous automaton meanwhile
+            self._active = (AhoCorasick(snapshot), snapshot)
+            self._compiled_version = compiled_version
+
+    def wait_compiled(self, timeout: float = 5.0) -> bool:
+        """Block until the automaton includes every subscription change made so far (tests, startup)."""
+        deadline = time.time() + timeout
+        while self._compiled_version < self._version:
+            if time.time() >= deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def _run_matcher(self) -> None:
+        last_delivery = time.time()
+        while True:
+            try:
+                item = self._lines.get(timeout=self.delivery_interval)
+            except queue.Empty:
+                item = None
+
+            if item is not None:
+                batch = [item]
+                while len(batch) < self.max_batch:  # drain what is there, one automaton lookup per batch
+                    try:
+                        batch.append(self._lines.get_nowait())
+                    except queue.Empty:
+                        break
+                automaton, keyword_users = self._active
+                for line, level_name, logged_at in batch:
+                    for keyword in automaton.find(line):
+                        for user in keyword_users.get(keyword, ()):
+                            self._pending[user].append((keyword, line, level_name, logged_at))
+                            self._pending_count += 1
+                for _ in batch:
+                    self._lines.task_done()
+
+            if self._pending_count >= self.max_batch or time.time() - last_delivery >= self.delivery_interval:
+                self._deliver_pending()
+                last_delivery = time.time()
+            if item is None and self._stopped:
+                return
+
+    def _deliver_pending(self) -> None:
+        pending, self._pending = self._pending, defaultdict(list)
+        self._pending_count = 0
+        for user, alerts in pending.items():
+            try:
+                self.deliver(user, alerts)
+            except Exception as e:  # one failing subscriber must not stop the alerts of the others
+                print(f"[KeywordAlerter] delivery to {user} failed: {e}")
+
+    def flush(self) -> None:
+        """Match everything logged so far and deliver the pending alerts."""
+        self._lines.join()
+        # the matcher delivers on its next wake up, at the latest delivery_interval from now
+        while self._pending_count:
+            time.sleep(0.001)
+
+    def stop(self) -> None:
+        self.flush()
+        with self._subscriptions_lock:
+            self._stopped = True
+            self._compile_needed.notify()
+        self._compiler.join()
+        self._matcher.join()
@@ -0,0 +1,294 @@
+import argparse
+import struct
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterator, Tuple
+
+from low.src.logger.log_writers.file import LogWriterInFile
+
+
+MAGIC = b"BLOG\x01"
+
+# every record: <varint body length><uint8 record type><body>, varints are LEB128, signed ones zigzag
+TEMPLATE = 1  # body: <varint template id><utf-8 template>
+LOG = 2       # body: <zigzag varint microseconds since the previous record><uint8 level><varint template id>
+              #       <uint8 arg count><args>
+CLOCK = 3     # body: <varint microseconds since the epoch>, what the following LOG deltas start from,
+              #       written whenever the writer (re)opens the file
+
+FLOAT64 = struct.Struct("<d")
+
+LEVEL_NAMES = {0: "LOG", 1: "DEBUG", 2: "INFO", 3: "WARNING", 4: "ERROR", 5: "CRITICAL"}
+
+# (timestamp, level, template, args) as handed to the writer
+Record = Tuple[float, int, str, tuple]
+
+
+def _varint(value: int) -> bytes:
+    if value < 0x80:
+        return bytes((value,))
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _zigzag(value: int) -> bytes:
+    return _varint(value << 1 if value >= 0 else (-value << 1) - 1)
+
+
+def _read_varint(data, position: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def _read_zigzag(data, position: int) -> Tuple[int, int]:
+    value, position = _read_varint(data, position)
+    return (value >> 1) ^ -(value & 1), position
+
+
+def _encode_str(arg: str) -> bytes:
+    data = arg.encode("utf-8")
+    return b"s" + _varint(len(data)) + data
+
+
+def _encode_int(arg: int) -> bytes:
+    if -2 ** 63 <= arg < 2 ** 63:
+        return b"i" + _zigzag(arg)
+    return _encode_str(str(arg))
+
+
+# exact type -> encoder, one dict lookup instead of an isinstance chain per argument
+_ENCODERS = {
+    str: _encode_str,
+    int: _encode_int,
+    float: lambda arg: b"f" + FLOAT64.pack(arg),
+    bool: lambda arg: b"t" if arg else b"F",
+    type(None): lambda arg: b"n",
+}
+
+
+# a LOG record stores its argument count in one byte
+MAX_ARGS = 255
+
+# messages without arguments (write_log(str), formatted or callable messages) are all stored under
+# this template with the text as its argument, they would otherwise each become a template
+TEXT_TEMPLATE = "%s"
+
+
+def _encode_arg(arg: Any) -> bytes:
+    encoder = _ENCODERS.get(type(arg))
+    return encoder(arg) if encoder is not None else _encode_str(str(arg))
+
+
+def _decode_args(body: bytes, position: int, count: int) -> tuple:
+    args = []
+    for _ in range(count):
+        tag = body[position]
+        position += 1
+        if tag == 0x69:  # i
+            value, position = _read_zigzag(body, position)
+            args.append(value)
+        elif tag == 0x66:  # f
+            args.append(FLOAT64.unpack_from(body, position)[0])
+            position += FLOAT64.size
+        elif tag == 0x73:  # s
+            length, position = _read_varint(body, position)
+            args.append(body[position:position + length].decode("utf-8"))
+            position += length
+        elif tag in (0x74, 0x46):  # t, F
+            args.append(tag == 0x74)
+        elif tag == 0x6E:  # n
+            args.append(None)
+        else:
+            raise ValueError(f"unknown argument tag {tag!r}")
+    return tuple(args)
+
+
+class BinaryLogWriter(LogWriterInFile):
+    """
+    Structured log writer: records are (timestamp, level, message template id, args) in a length
+    prefixed binary format instead of formatted text lines.
+
+    The text of a template ("user %s took %.2fs") is written once per file as a TEMPLATE record,
+    every log then only costs its id and its raw arguments, so nothing is formatted at log time and
+    records can be aggregated by template id without parsing text. Logger passes the template and
+    args straight to write_record. A message without args (write_log(str), an already formatted or
+    callable message) is no template: it is stored as TEXT_TEMPLATE with the text as argument. At
+    most max_templates templates are kept, later new ones are formatted by the caller and stored
+    as text too, so a process logging ever new templates doesn't grow the table forever.
+
+    Integers and lengths are varints and timestamps microsecond deltas to the previous record, a
+    typical record is ~10 bytes plus its string arguments.
+
+    Buffering, the background flusher, the full queue policy and rotation are LogWriterInFile's,
+    encoding happens on the flusher thread. Arguments of other types are turned into str by
+    write_record, on the caller's thread: what is stored is the value at log time, even if the
+    object changes before the flush. Decode with `python -m low.src.logger.log_writers.binary`.
+    """
+    def __init__(self, file_path: str, buffer_threshold: int = 1024, max_templates: int = 10_000, **kwargs):
+        self.max_templates = max_templates
+        self._accepted_templates = set()  # caller side, the flusher only sees a template once it flushes
+        self.template_ids: Dict[str, int] = {}
+        self._templates_in_file = set()
+        self._last_micros = None
+        super().__init__(file_path, buffer_threshold=buffer_threshold, **kwargs)
+
+    def write_record(self, level: int, template: str, args: tuple = ()) -> bool:
+        self._check_writable()
+        if not args:
+            template, args = TEXT_TEMPLATE, (template,)
+        elif template not in self._accepted_templates:
+            # no lock: concurrent callers can let a few templates more than max_templates in
+            if len(self._accepted_templates) < self.max_templates:
+                self._accepted_templates.add(template)
+            else:
+                template, args = TEXT_TEMPLATE, (render_message(template, args),)
+        if len(args) > MAX_ARGS:
+            raise ValueError(f"a log record takes at most {MAX_ARGS} arguments, got {len(args)}")
+        encoders = _ENCODERS
+        for arg in args:
+            if type(arg) not in encoders:
+                args = tuple(arg if type(arg) in encoders else str(arg) for arg in args)
+                break
+        return self.write_through_buffer((time.time(), level, template, args))
+
+    def write_log(self, log) -> bool:
+        return self.write_record(0, str(log))
+
+    def _open_file(self):
+        file = open(self.file_path, "ab")
+        if file.tell() == 0:
+            file.write(MAGIC)
+        # a file (new segment, or a file of an earlier run) must define its templates itself
+        # and gets a CLOCK record before the next LOG
+        self._templates_in_file = set()
+        self._last_micros = None
+        return file
+
+    def _template_id(self, template: str, out: list) -> int:
+        template_id = self.template_ids.get(template)
+        if template_id is None:
+            template_id = self.template_ids[template] = len(self.template_ids) + 1
+        if template_id not in self._templates_in_file:
+            body = _varint(template_id) + template.encode("utf-8")
+            out.append(_varint(len(body) + 1) + bytes((TEMPLATE,)) + body)
+            self._templates_in_file.add(template_id)
+        return template_id
+
+    def encode(self, records: list) -> bytes:
+        out = []
+        last_micros = self._last_micros
+        encoders = _ENCODERS
+        for timestamp, level, template, args in records:
+            template_id = self._template_id(template, out)
+            micros = int(timestamp * 1_000_000)
+            if last_micros is None:
+                body = _varint(micros)
+                out.append(_varint(len(body) + 1) + bytes((CLOCK,)) + body)
+                last_micros = micros
+            body = bytearray(_zigzag(micros - last_micros))
+            body += bytes((level,))
+            body += _varint(template_id)
+            body.append(len(args))
+            for arg in args:
+                encoder = encoders.get(type(arg))
+                body += encoder(arg) if encoder is not None else _encode_str(str(arg))
+            last_micros = micros
+            out.append(_varint(len(body) + 1) + bytes((LOG,)) + body)
+        self._last_micros = last_micros
+        return b"".join(out)
+
+    def _write_lines(self, lines: list) -> None:
+        self._file.write(self.encode(lines))
+
+
+def iter_records(file: BinaryIO, read_size: int = 1024 * 1024) -> Iterator[Tuple[float, int, int, str, tuple]]:
+    """(timestamp, level, template id, template, args) of every log record of a binary log file."""
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"{getattr(file, 'name', 'file')} is not a binary log file")
+    templates = {}
+    micros = 0
+    data = b""
+    position = 0
+    while True:
+        if len(data) - position < 16:
+            more = file.read(read_size)
+            data = data[position:] + more
+            position = 0
+        if position >= len(data):
+            return
+        try:
+            length, body_start = _read_varint(data, position)
+        except IndexError:
+            return  # a record cut by a crash
+        end = body_start + length
+        while end > len(data):
+            more = file.read(max(read_size, end - len(data)))
+            if not more:
+                return
+            data = data[position:] + more
+            end -= position
+            body_start -= position
+            position = 0
+
+        record_type = data[body_start]
+        if record_type == TEMPLATE:
+            template_id, text_start = _read_varint(data, body_start + 1)
+            templates[template_id] = data[text_start:end].decode("utf-8")
+        elif record_type == LOG:
+            delta, cursor = _read_zigzag(data, body_start + 1)
+            micros += delta
+            level = data[cursor]
+            template_id, cursor = _read_varint(data, cursor + 1)
+            args = _decode_args(data, cursor + 1, data[cursor])
+            yield micros / 1_000_000, level, template_id, templates[template_id], args
+        elif record_type == CLOCK:
+            micros, _ = _read_varint(data, body_start + 1)
+        position = end
+
+
+def render_message(template: str, args: tuple) -> str:
+    try:
+        return template % args if args else template
+    except (TypeError, ValueError):
+        return f"{template} {args}"
+
+
+def render(timestamp: float, level: int, template: str, args: tuple) -> str:
+    return f"{datetime.fromtimestamp(timestamp).isoformat()} [{LEVEL_NAMES.get(level, level)}] {render_message(template, args)}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="render a binary log file as text")
+    parser.add_argument("path")
+    parser.add_argument("--stats", action="store_true", help="count records per message template instead")
+    args = parser.parse_args()
+
+    with open(args.path, "rb") as file:
+        if args.stats:
+            counts = Counter()
+            templates = {}
+            for _, level, template_id, template, _ in iter_records(file):
+                counts[template_id] += 1
+                templates[template_id] = template
+            for template_id, count in counts.most_common():
+                print(f"{count:>12,}  #{template_id:<6} {templates[template_id]}")
+            return
+
+        for timestamp, level, _, template, record_args in iter_records(file):
+            sys.stdout.write(render(timestamp, level, template, record_args) + "\n")
+
+
+if __name__ == "__main__":
+    main()
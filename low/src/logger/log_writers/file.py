@@ -1,34 +1,298 @@
+import atexit
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
 from low.src.logger.log_writers.abstract_class import LogWriter
+from low.src.logger.log_writers.segments import SegmentCompressor, SegmentIndex, check_compression
+
+
+Batch = Tuple[float, float, List[str]]  # (time of the first line, time of the last line, lines)
+SequencedBatch = Tuple[int, Batch]  # batches are numbered when they leave the buffer, the flusher writes them in that order
 
 
 class LogWriterInFile(LogWriter):
-    def __init__(self, file_path: str, buffer_threshold: int, log_line_separator: str = "\n"):
-        # Assuming only one file will be there, instead we can create multiple files based on
-        # - time stamp, read and retrival will be easy
-        # - number of rows
+    """
+    Buffered, thread safe file writer, the disk I/O happens on a background flusher thread.
+
+    Callers append to an in memory buffer under a lock; when it holds buffer_threshold lines it is
+    numbered and handed as one batch to a bounded queue. Threads reach the queue in any order, the
+    flusher holds back a batch until all the lower numbered ones are written, so the file stays in
+    logging order across threads. The flusher keeps the file open, writes every batch with
+    a single writelines + flush, and also takes the buffer itself when it has waited flush_interval
+    seconds, so a quiet logger doesn't keep lines in memory forever.
+
+    When the queue is full (disk slower than the log rate) full_queue_policy decides:
+        "block": the caller waits for a free slot, no log is lost
+        "drop":  the batch is dropped and counted in self.dropped, the caller never waits
+
+    A batch that fails to write (file can't be opened, disk full, ...) is reported on stderr and
+    counted in self.failed, the flusher goes on with the next one and reopens the file. A segment
+    that fails to compress is reported the same way, counted in self.compression_failures.
+
+    Rotation: with max_bytes, max_lines and/or rotate_interval (seconds) the file is rotated by the
+    flusher to <file_path>.<n> once a limit is reached (checked before every batch, so a segment can
+    pass a limit by one batch). Rotated segments are compressed ("gzip", "zstd" or None) on a
+    background thread and recorded in a SegmentIndex (<file_path>.index.jsonl) with the time range
+    of their lines, SegmentIndex(file_path).files_for_range(start, end) lists what a reader has to open.
+    """
+    FULL_QUEUE_POLICIES = ("block", "drop")
+
+    def __init__(self, file_path: str, buffer_threshold: int, log_line_separator: str = "\n",
+                 flush_interval: float = 1.0, queue_size: int = 1024, full_queue_policy: str = "block",
+                 max_bytes: Optional[int] = None, max_lines: Optional[int] = None,
+                 rotate_interval: Optional[float] = None, compression: Optional[str] = "gzip"):
+        if full_queue_policy not in self.FULL_QUEUE_POLICIES:
+            raise ValueError(f"unknown full queue policy: {full_queue_policy}, expected one of {self.FULL_QUEUE_POLICIES}")
+        check_compression(compression)
         self.file_path = file_path
         self.buffer_threshold = buffer_threshold
         self.log_line_separator = log_line_separator
+        self.flush_interval = flush_interval
+        self.full_queue_policy = full_queue_policy
         self.buffer = []
+        self.dropped = 0
+        self.failed = 0  # lines of the batches that failed to write
+        self.last_error: Optional[BaseException] = None
+        self._next_batch_number = 0  # of the next batch taken from the buffer
+        self._dropped_batch_numbers = set()  # dropped by the "drop" policy, the flusher skips them
+        # flusher side: number of the next batch to write (notified on _written), batches waiting
+        # for a lower numbered one
+        self._next_to_write = 0
+        self._held_back: Dict[int, Batch] = {}
+        self._written = threading.Condition()
+        self._buffer_started_at = 0.0
+
+        self.max_bytes = max_bytes
+        self.max_lines = max_lines
+        self.rotate_interval = rotate_interval
+        self.compression = compression
+        self.rotates = any(limit is not None for limit in (max_bytes, max_lines, rotate_interval))
+        self.segment_index = SegmentIndex(file_path) if self.rotates else None
+        self.compression_failures = 0
+        self._compressor = (SegmentCompressor(self.segment_index, compression, on_error=self._compression_failed)
+                            if self.rotates and compression else None)
+        self._segment = self._new_segment_stats()
+
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._file = None
+        self._closed = False
+        self._flusher = threading.Thread(target=self._run_flusher, name="LogWriterInFile-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def _swap_buffer(self) -> Optional[SequencedBatch]:
+        """Caller holds self._lock."""
+        if not self.buffer:
+            return None
+        batch, self.buffer = (self._buffer_started_at, time.time(), self.buffer), []
+        batch_number = self._next_batch_number
+        self._next_batch_number += 1
+        return batch_number, batch
+
+    def _new_segment_stats(self) -> dict:
+        stats = {"first_ts": None, "last_ts": None, "lines": 0, "bytes": 0}
+        if os.path.exists(self.file_path) and os.path.getsize(self.file_path):
+            # left over by a previous run, its line count and first log time are unknown
+            stats.update(first_ts=os.path.getmtime(self.file_path), last_ts=os.path.getmtime(self.file_path),
+                         bytes=os.path.getsize(self.file_path))
+        return stats
+
+    def _should_rotate(self, now: float) -> bool:
+        segment = self._segment
+        if not self.rotates or not segment["bytes"]:
+            return False
+        return ((self.max_bytes is not None and segment["bytes"] >= self.max_bytes)
+                or (self.max_lines is not None and segment["lines"] >= self.max_lines)
+                or (self.rotate_interval is not None and now - segment["first_ts"] >= self.rotate_interval))
+
+    def rotate(self) -> None:
+        """Runs on the flusher: close the active file, rename it to the next segment, compress it in the background."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        segment_number = self.segment_index.next_segment_number()
+        rotated_path = f"{self.file_path}.{segment_number:06d}"
+        os.replace(self.file_path, rotated_path)
+
+        entry = {"segment": segment_number, "file": os.path.basename(rotated_path), **self._segment}
+        self._segment_rotated(rotated_path)
+        self.segment_index.append(entry)
+        if self._compressor is not None:
+            self._compressor.submit(entry)
+        self._segment = self._new_segment_stats()
+
+    def _segment_rotated(self, rotated_path: str) -> None:
+        """Hook for subclasses, called on the flusher after the active file became rotated_path."""
 
-    def persist_buffer_asynchronously(self) -> bool:
-        with open(self.file_path, 'a') as file:
-            for line in self.buffer:
-                file.write(line)
-                file.write(self.log_line_separator)
-        return True
+    def _open_file(self):
+        return open(self.file_path, "a")
+
+    def _write_lines(self, lines: list) -> None:
+        separator = self.log_line_separator
+        self._file.writelines(line + separator for line in lines)
+
+    def _write_batch(self, batch: Batch) -> None:
+        first_ts, last_ts, lines = batch
+        if self._should_rotate(now=last_ts):
+            self.rotate()
+        if self._file is None:
+            self._file = self._open_file()
+        self._write_lines(lines)
+        self._file.flush()
+
+        segment = self._segment
+        segment["first_ts"] = first_ts if segment["first_ts"] is None else segment["first_ts"]
+        segment["last_ts"] = last_ts
+        segment["lines"] += len(lines)
+        segment["bytes"] = self._file.tell()
+
+    def _report_error(self, message: str, error: Exception) -> None:
+        self.last_error = error
+        print(f"[LogWriterInFile] {message}: {error!r}", file=sys.stderr)
+
+    def _compression_failed(self, entry: dict, error: Exception) -> None:
+        """Runs on the compressor thread, the segment stays uncompressed."""
+        self.compression_failures += 1
+        self._report_error(f"compressing segment {entry['file']} failed, it is left as it is", error)
+
+    def _write_batch_safely(self, batch: Batch) -> None:
+        """_write_batch that never lets an error stop the flusher, the batch is lost and counted."""
+        try:
+            self._write_batch(batch)
+        except Exception as e:
+            self.failed += len(batch[2])
+            self._report_error(f"writing {len(batch[2])} lines to {self.file_path} failed", e)
+            # the next batch reopens the file, the segment stats start over from what is on disk
+            if self._file is not None:
+                try:
+                    self._file.close()
+                except Exception:
+                    pass
+                self._file = None
+            try:
+                self._segment = self._new_segment_stats()
+            except OSError:
+                pass
+
+    def _advance(self) -> None:
+        with self._written:
+            self._next_to_write += 1
+            self._written.notify_all()
+
+    def _write_ready(self) -> None:
+        """Runs on the flusher: write the held back batches that are next in line."""
+        while True:
+            batch = self._held_back.pop(self._next_to_write, None)
+            if batch is not None:
+                self._write_batch_safely(batch)
+            else:
+                with self._lock:
+                    if self._next_to_write not in self._dropped_batch_numbers:
+                        return
+                    self._dropped_batch_numbers.discard(self._next_to_write)
+            self._advance()
+
+    def _run_flusher(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                # nothing reached the threshold for flush_interval seconds, write what is buffered
+                # (after any lower numbered batch still on its way) and skip past dropped batches
+                with self._lock:
+                    item = self._swap_buffer()
+                if item is not None:
+                    self._held_back[item[0]] = item[1]
+                self._write_ready()
+                continue
+
+            if item is None:  # close() sentinel
+                return
+            batch_number, batch = item
+            self._held_back[batch_number] = batch
+            self._write_ready()
+
+    def persist_buffer_asynchronously(self, batch_number: int, batch: Batch) -> bool:
+        """Hand a batch to the flusher thread, returns False when it was dropped."""
+        if self.full_queue_policy == "block":
+            self._put((batch_number, batch))
+            return True
+        try:
+            self._queue.put_nowait((batch_number, batch))
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += len(batch[2])
+                self._dropped_batch_numbers.add(batch_number)
+            return False
 
     def write_through_buffer(self, log: str) -> bool:
-        self.buffer.append(log)
-        if len(self.buffer) >= self.buffer_threshold:
-            # TODO: make is async
-            # TODO: make it thread safe
-            self.persist_buffer_asynchronously()
-            self.buffer = []
-        return True
+        with self._lock:
+            if not self.buffer:
+                self._buffer_started_at = time.time()
+            self.buffer.append(log)
+            if len(self.buffer) < self.buffer_threshold:
+                return True
+            batch_number, batch = self._swap_buffer()
+        return self.persist_buffer_asynchronously(batch_number, batch)
+
+    def _check_flusher(self) -> None:
+        if not self._flusher.is_alive():
+            raise RuntimeError(f"flusher thread of the log writer for {self.file_path} is not running")
 
+    def _check_writable(self) -> None:
+        if self._closed:
+            raise ValueError(f"log writer for {self.file_path} is closed")
+        self._check_flusher()
+
+    def _put(self, item: Optional[SequencedBatch]) -> None:
+        """Blocking queue.put that gives up when the flusher is gone instead of waiting forever."""
+        while True:
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                self._check_flusher()
+
+    def _wait_written(self, batch_count: int) -> None:
+        """Wait until the first batch_count batches are written (or dropped), gives up when the flusher is gone."""
+        with self._written:
+            while self._next_to_write < batch_count:
+                self._check_flusher()
+                self._written.wait(0.1)
 
     def write_log(self, log) -> bool:
-        # TODO: Handle error
+        self._check_writable()
         return self.write_through_buffer(log)
 
+    def flush(self) -> None:
+        """Block until everything logged so far is written to the file (or failed to, see self.failed)."""
+        with self._lock:
+            item = self._swap_buffer()
+            batch_count = self._next_batch_number
+        if item is not None:
+            self._put(item)
+        self._wait_written(batch_count)
+
+    def close(self) -> None:
+        """Write the remaining logs, stop the flusher and close the file. Safe to call twice."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if self._flusher.is_alive():
+                self.flush()
+                self._queue.put(None)
+                self._flusher.join()
+        finally:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self._compressor is not None:
+                self._compressor.stop()
+            atexit.unregister(self.close)
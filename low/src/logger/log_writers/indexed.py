@@ -0,0 +1,295 @@
+import json
+import os
+import re
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from low.src.logger.log_writers.file import Batch, LogWriterInFile
+from low.src.logger.log_writers.segments import SegmentIndex
+
+
+# words of 2+ characters starting with a letter, pure numbers (ids, counters) are not indexed
+TOKEN = re.compile(r"[a-z_][a-z0-9_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN.findall(text.lower())
+
+
+class LineIndex:
+    """
+    Index of the lines of one log file (segment):
+        postings: token -> array('Q') of the byte offsets of the lines containing it, increasing
+        batches:  sparse time index, one (first_ts, last_ts, offset) per flushed batch
+    Lines carry no timestamp of their own, so a time range resolves to whole batches.
+
+    Saved as <segment>.idx: a json header line (counts and sizes), the sorted tokens ("\n" joined),
+    the position and count of every token's postings, the three batch arrays and the postings. A
+    loaded index bisects the tokens and only reads the postings it is asked for.
+    """
+    SUFFIX = ".idx"
+
+    def __init__(self):
+        self.postings: Dict[str, array] = {}
+        self.batch_first_ts = array("d")
+        self.batch_last_ts = array("d")
+        self.batch_offset = array("Q")
+        self.lines = 0
+        self._path = None
+        self._tokens = None  # sorted tokens of a loaded index, with their position/count in the postings
+        self._positions = self._counts = None
+        self._postings_start = 0
+
+    def add_batch(self, first_ts: float, last_ts: float, offsets: Iterable[int], lines: List[str]) -> None:
+        offsets = list(offsets)
+        if not offsets:
+            return
+        self.batch_first_ts.append(first_ts)
+        self.batch_last_ts.append(last_ts)
+        self.batch_offset.append(offsets[0])
+        postings = self.postings
+        for offset, line in zip(offsets, lines):
+            for token in set(TOKEN.findall(line.lower())):
+                posting = postings.get(token)
+                if posting is None:
+                    posting = postings[token] = array("Q")
+                posting.append(offset)
+        self.lines += len(offsets)
+
+    def offset_range(self, start_ts: Optional[float], end_ts: Optional[float]) -> Optional[Tuple[int, Optional[int]]]:
+        """
+        [first offset, end offset) of the batches overlapping [start_ts, end_ts], end None = end of
+        file, None when no batch overlaps.
+        """
+        first = 0 if start_ts is None else bisect_left(self.batch_last_ts, start_ts)
+        last = len(self.batch_first_ts) if end_ts is None else bisect_right(self.batch_first_ts, end_ts)
+        if first >= last:
+            return None
+        start = self.batch_offset[first]
+        end = self.batch_offset[last] if last < len(self.batch_offset) else None
+        return start, end
+
+    def posting(self, token: str) -> array:
+        if self._tokens is None:
+            return self.postings.get(token, array("Q"))
+        posting = array("Q")
+        i = bisect_left(self._tokens, token.encode("utf-8"))
+        if i < len(self._tokens) and self._tokens[i] == token.encode("utf-8"):
+            with open(self._path, "rb") as f:
+                f.seek(self._postings_start + self._positions[i] * posting.itemsize)
+                posting.frombytes(f.read(self._counts[i] * posting.itemsize))
+        return posting
+
+    def find(self, keywords: List[str], start_ts: Optional[float] = None,
+             end_ts: Optional[float] = None) -> List[int]:
+        """Offsets of the lines containing every keyword, within the time range, in file order."""
+        tokens = [token for keyword in keywords for token in tokenize(keyword)]
+        if not tokens:
+            raise ValueError(f"no indexable token in {keywords}")
+        offset_range = self.offset_range(start_ts, end_ts)
+        if offset_range is None:
+            return []
+        start, end = offset_range
+
+        postings = sorted((self.posting(token) for token in set(tokens)), key=len)
+        first = postings[0]
+        # the shortest posting list drives, membership in the (sorted) others is a bisect
+        lo = bisect_left(first, start)
+        hi = len(first) if end is None else bisect_left(first, end)
+        others = postings[1:]
+
+        def in_all(offset: int) -> bool:
+            for other in others:
+                i = bisect_left(other, offset)
+                if i == len(other) or other[i] != offset:
+                    return False
+            return True
+
+        return [offset for offset in first[lo:hi] if in_all(offset)]
+
+    def save(self, path: str) -> None:
+        tokens = sorted(self.postings)
+        token_blob = "\n".join(tokens).encode("utf-8")
+        positions, counts = array("Q"), array("Q")
+        position = 0
+        for token in tokens:
+            positions.append(position)
+            counts.append(len(self.postings[token]))
+            position += counts[-1]
+        header = {"lines": self.lines, "batches": len(self.batch_offset), "tokens": len(tokens),
+                  "token_bytes": len(token_blob)}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            f.write(token_blob)
+            for column in (positions, counts, self.batch_first_ts, self.batch_last_ts, self.batch_offset):
+                column.tofile(f)
+            for token in tokens:
+                self.postings[token].tofile(f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, postings: bool = False) -> "LineIndex":
+        """Tokens and time index, the postings are read on demand unless postings=True."""
+        index = cls()
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            tokens = f.read(header["token_bytes"]).split(b"\n") if header["tokens"] else []
+            positions, counts = array("Q"), array("Q")
+            positions.fromfile(f, header["tokens"])
+            counts.fromfile(f, header["tokens"])
+            for column in (index.batch_first_ts, index.batch_last_ts, index.batch_offset):
+                column.fromfile(f, header["batches"])
+            index.lines = header["lines"]
+            if postings:
+                blob = array("Q")
+                blob.frombytes(f.read())
+                index.postings = {token.decode("utf-8"): blob[position:position + count]
+                                  for token, position, count in zip(tokens, positions, counts)}
+                return index
+            index._postings_start = f.tell()
+        # sorted token bytes, bisect instead of building a dict of every token
+        index._tokens, index._positions, index._counts = tokens, positions, counts
+        index._path = path
+        return index
+
+
+def read_lines_at(path: str, offsets: List[int], encoding: str = "utf-8") -> Iterator[Tuple[int, str]]:
+    with open(path, "rb") as f:
+        for offset in offsets:
+            f.seek(offset)
+            yield offset, f.readline().decode(encoding).rstrip("\n")
+
+
+class IndexedLogWriter(LogWriterInFile):
+    """
+    LogWriterInFile that indexes what it writes, for keyword + time range search without grepping.
+
+    The flusher tokenizes every batch it writes into the LineIndex of the active segment (kept in
+    memory), a rotated segment gets its index saved next to it as <segment>.idx, and close() saves
+    the active one as <file_path>.idx. Rotation bounds the in memory index (max_lines defaults to
+    1M lines per segment); segments stay uncompressed so that lines can be read by offset.
+
+    search(keywords, start_ts, end_ts) reads only the index of the segments overlapping the range
+    and seeks straight to the matching lines. LogSearcher does the same from another process.
+    """
+    def __init__(self, file_path: str, buffer_threshold: int = 1024, max_lines: Optional[int] = 1_000_000,
+                 encoding: str = "utf-8", **kwargs):
+        if kwargs.get("compression") is not None:
+            raise ValueError("IndexedLogWriter reads lines by offset, its segments can't be compressed")
+        kwargs["compression"] = None
+        if kwargs.get("log_line_separator", "\n") != "\n":
+            raise ValueError("IndexedLogWriter needs newline separated lines")
+        self.encoding = encoding
+        self._index_lock = threading.Lock()
+        self.active_index = self._load_active_index(file_path)
+        super().__init__(file_path, buffer_threshold=buffer_threshold, max_lines=max_lines, **kwargs)
+
+    def _load_active_index(self, file_path: str) -> LineIndex:
+        """Index of an existing active file: its saved .idx, or rebuilt by reading it after a crash."""
+        index_path = file_path + LineIndex.SUFFIX
+        index = LineIndex()
+        if os.path.exists(index_path):
+            if os.path.exists(file_path):
+                index = LineIndex.load(index_path, postings=True)
+            os.remove(index_path)
+            return index
+        if os.path.exists(file_path) and os.path.getsize(file_path):
+            mtime = os.path.getmtime(file_path)
+            offsets, lines = [], []
+            offset = 0
+            with open(file_path, "rb") as f:
+                for raw in f:
+                    offsets.append(offset)
+                    lines.append(raw.decode(self.encoding, errors="replace"))
+                    offset += len(raw)
+            index.add_batch(0.0, mtime, offsets, lines)
+        return index
+
+    def _open_file(self):
+        return open(self.file_path, "a", encoding=self.encoding)
+
+    def _write_batch(self, batch: Batch) -> None:
+        first_ts, last_ts, lines = batch
+        with self._index_lock:
+            super()._write_batch(batch)
+            # super() may have rotated, the batch was written at the end of the active file
+            lengths = [len(line) + 1 if line.isascii() else len(line.encode(self.encoding)) + 1 for line in lines]
+            offset = self._segment["bytes"] - sum(lengths)
+            offsets = []
+            for length in lengths:
+                offsets.append(offset)
+                offset += length
+            self.active_index.add_batch(first_ts, last_ts, offsets, lines)
+
+    def _segment_rotated(self, rotated_path: str) -> None:
+        self.active_index.save(rotated_path + LineIndex.SUFFIX)
+        self.active_index = LineIndex()
+
+    def close(self) -> None:
+        already_closed = self._closed
+        super().close()
+        if not already_closed and self.active_index.lines:
+            self.active_index.save(self.file_path + LineIndex.SUFFIX)
+
+    def search(self, keywords: List[str], start_ts: Optional[float] = None, end_ts: Optional[float] = None,
+               limit: Optional[int] = None) -> List[Tuple[str, int, str]]:
+        """
+        (file, offset, line) of the flushed lines containing every keyword (token match, case
+        insensitive) logged within [start_ts, end_ts] (batch granularity), oldest first.
+        Holds the index lock, so no rotation moves lines between the segments and the active file
+        meanwhile; the flusher waits for the search.
+        """
+        with self._index_lock:
+            results = LogSearcher(self.file_path, encoding=self.encoding).search_segments(
+                keywords, start_ts, end_ts, limit)
+            if limit is not None and len(results) >= limit:
+                return results
+            offsets = self.active_index.find(keywords, start_ts, end_ts)
+            if limit is not None:
+                offsets = offsets[:limit - len(results)]
+            results.extend((self.file_path, offset, line)
+                           for offset, line in read_lines_at(self.file_path, offsets, self.encoding))
+        return results
+
+
+class LogSearcher:
+    """Keyword + time range search over the segments (and the saved active index) of an IndexedLogWriter."""
+    def __init__(self, file_path: str, encoding: str = "utf-8"):
+        self.file_path = file_path
+        self.encoding = encoding
+        self.segment_index = SegmentIndex(file_path)
+
+    def _search_file(self, path: str, keywords: List[str], start_ts: Optional[float], end_ts: Optional[float],
+                     limit: Optional[int]) -> List[Tuple[str, int, str]]:
+        index_path = path + LineIndex.SUFFIX
+        if not os.path.exists(index_path):
+            return []
+        offsets = LineIndex.load(index_path).find(keywords, start_ts, end_ts)
+        if limit is not None:
+            offsets = offsets[:limit]
+        return [(path, offset, line) for offset, line in read_lines_at(path, offsets, self.encoding)]
+
+    def search_segments(self, keywords: List[str], start_ts: Optional[float] = None, end_ts: Optional[float] = None,
+                        limit: Optional[int] = None) -> List[Tuple[str, int, str]]:
+        """Rotated segments only."""
+        results = []
+        for path in self.segment_index.files_for_range(start_ts, end_ts):
+            if path == self.file_path:
+                continue
+            results.extend(self._search_file(path, keywords, start_ts, end_ts,
+                                             None if limit is None else limit - len(results)))
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    def search(self, keywords: List[str], start_ts: Optional[float] = None, end_ts: Optional[float] = None,
+               limit: Optional[int] = None) -> List[Tuple[str, int, str]]:
+        """Rotated segments plus the active file as of the writer's last close()."""
+        results = self.search_segments(keywords, start_ts, end_ts, limit)
+        if limit is None or len(results) < limit:
+            results.extend(self._search_file(self.file_path, keywords, start_ts, end_ts,
+                                             None if limit is None else limit - len(results)))
+        return results
@@ -0,0 +1,161 @@
+import gzip
+import io
+import json
+import os
+import shutil
+import sys
+import threading
+from typing import Callable, Dict, List, Optional
+
+try:
+    import zstandard
+except ImportError:  # only needed for compression="zstd"
+    zstandard = None
+
+
+COMPRESSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def check_compression(compression: Optional[str]) -> None:
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"unknown compression: {compression}, expected one of {list(COMPRESSIONS)}")
+    if compression == "zstd" and zstandard is None:
+        raise ImportError("compression='zstd' needs the zstandard package")
+
+
+def compress_segment(path: str, compression: Optional[str]) -> str:
+    """Compress a rotated segment next to itself (tmp + rename) and remove the original."""
+    if compression is None:
+        return path
+    compressed_path = path + COMPRESSIONS[compression]
+    tmp_path = compressed_path + ".tmp"
+    try:
+        with open(path, "rb") as source, open(tmp_path, "wb") as target:
+            if compression == "gzip":
+                with gzip.GzipFile(fileobj=target, mode="wb", compresslevel=6) as gz:
+                    shutil.copyfileobj(source, gz, 1024 * 1024)
+            else:
+                zstandard.ZstdCompressor().copy_stream(source, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, compressed_path)
+    os.remove(path)
+    return compressed_path
+
+
+def open_segment(path: str, encoding: str = "utf-8"):
+    """Text reader for a plain, .gz or .zst segment."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding=encoding)
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise ImportError(f"reading {path} needs the zstandard package")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb")), encoding=encoding)
+    return open(path, "r", encoding=encoding)
+
+
+class SegmentIndex:
+    """
+    <log file>.index.jsonl, one json line per rotated segment:
+        {"segment": n, "file": "log_file.txt.000003.gz", "first_ts": ..., "last_ts": ..., "lines": ..., "bytes": ...}
+
+    An entry is appended when a segment is rotated and again once it is compressed (with the new
+    file name), the last entry of a segment wins. Timestamps are the times the first and the last
+    line of the segment were logged, so a reader opens only the segments overlapping its range.
+    """
+    def __init__(self, log_file_path: str):
+        self.log_file_path = log_file_path
+        self.path = log_file_path + ".index.jsonl"
+        self._lock = threading.Lock()
+
+    def append(self, entry: dict) -> None:
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+
+    def segments(self) -> Dict[int, dict]:
+        """Latest entry of every segment, read under the lock so no half appended line is seen."""
+        entries = {}
+        with self._lock:
+            if os.path.exists(self.path):
+                with open(self.path, "r") as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            entries[entry["segment"]] = entry
+        return entries
+
+    def next_segment_number(self) -> int:
+        return max(self.segments(), default=0) + 1
+
+    def files_for_range(self, start_ts: Optional[float] = None, end_ts: Optional[float] = None) -> List[str]:
+        """
+        Segment files (oldest first) that can hold lines logged in [start_ts, end_ts], plus the
+        active log file when the range reaches past the last rotation.
+        """
+        directory = os.path.dirname(self.log_file_path)
+        files = []
+        last_ts = None
+        for _, entry in sorted(self.segments().items()):
+            last_ts = entry["last_ts"] if last_ts is None else max(last_ts, entry["last_ts"])
+            if (end_ts is None or entry["first_ts"] <= end_ts) and (start_ts is None or entry["last_ts"] >= start_ts):
+                files.append(os.path.join(directory, entry["file"]))
+        if os.path.exists(self.log_file_path) and (end_ts is None or last_ts is None or end_ts >= last_ts):
+            files.append(self.log_file_path)
+        return files
+
+
+def print_compression_error(entry: dict, error: Exception) -> None:
+    print(f"[SegmentCompressor] compressing {entry['file']} failed: {error!r}", file=sys.stderr)
+
+
+class SegmentCompressor:
+    """
+    Background thread compressing rotated segments and recording them in the SegmentIndex.
+    A segment that fails to compress (disk full, file removed, ...) is handed to on_error and stays
+    as it is, indexed under its uncompressed name; the thread goes on with the next one.
+    """
+    def __init__(self, index: SegmentIndex, compression: Optional[str],
+                 on_error: Callable[[dict, Exception], None] = print_compression_error):
+        self.index = index
+        self.compression = compression
+        self.on_error = on_error
+        self._pending = []
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="SegmentCompressor", daemon=True)
+        self._thread.start()
+
+    def submit(self, entry: dict) -> None:
+        with self._condition:
+            self._pending.append(entry)
+            self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopped:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                entry = self._pending.pop(0)
+
+            directory = os.path.dirname(self.index.log_file_path)
+            try:
+                compressed_path = compress_segment(os.path.join(directory, entry["file"]), self.compression)
+                self.index.append({**entry, "file": os.path.basename(compressed_path)})
+            except Exception as e:
+                try:
+                    self.on_error(entry, e)
+                except Exception:
+                    print_compression_error(entry, e)
+
+    def stop(self) -> None:
+        """Compress what is pending and stop the thread."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._thread.join()
@@ -11,16 +11,19 @@ def test_file_logger():
                                  buffer_threshold=buffer_threshold
                                  )
     logger =Logger(log_level=LogLevel.INFO,
-                   log_writer=log_writer
+                   log_writer=log_writer,
+                   debug_hook=lambda message, level, written: print(f"{level.name} written={written}: {message}")
                    )
 
     logger.debug("START")
 
-    logger.debug(f"This is debug msg at time {time.time()}")
-    logger.debug(f"This is debug msg at time {time.time()}")
-    logger.info(f"This is info msg at time {time.time()}")
-    logger.info(f"This is info msg at time {time.time()}")
+    # arguments are only formatted when the level is enabled, callables are only called then
+    logger.debug("This is debug msg at time %s", time.time())
+    logger.debug(lambda: f"This is debug msg at time {time.time()}")
+    logger.info("This is info msg at time %s", time.time())
+    logger.info(lambda: f"This is info msg at time {time.time()}")
     logger.debug("SUCCESS")
+    log_writer.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,69 @@
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from low.src.logger.log_writers.indexed import IndexedLogWriter, LogSearcher, tokenize
+from low.src.logger.log_writers.segments import SegmentIndex
+
+
+ACTIONS = ["login", "logout", "click", "search", "checkout", "upload", "download", "refresh"]
+STATUSES = ["ok"] * 50 + ["slow"] * 5 + ["error", "timeout"]
+
+
+def generate_logs(writer: IndexedLogWriter, lines: int, seed: int = 42) -> float:
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    for seq in range(lines):
+        writer.write_log(f"[INFO] user u{rng.randrange(100_000)} {rng.choice(ACTIONS)} "
+                         f"status {rng.choice(STATUSES)} region r{rng.randrange(20)} seq {seq}")
+    writer.close()
+    return time.perf_counter() - started
+
+
+def scan_search(file_path: str, keywords: list) -> int:
+    """What the index saves us from: read every segment and tokenize every line."""
+    tokens = {token for keyword in keywords for token in tokenize(keyword)}
+    matches = 0
+    for path in SegmentIndex(file_path).files_for_range():
+        with open(path, "r") as f:
+            for line in f:
+                if tokens.issubset(tokenize(line)):
+                    matches += 1
+    return matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IndexedLogWriter keyword search vs scanning the files")
+    parser.add_argument("--lines", type=int, default=10_000_000)
+    parser.add_argument("--segment-lines", type=int, default=1_000_000)
+    parser.add_argument("--dir", default=None, help="where to write the logs, a temporary directory by default")
+    args = parser.parse_args()
+
+    directory = args.dir or tempfile.mkdtemp(prefix="log_search_")
+    file_path = os.path.join(directory, "app.log")
+    writer = IndexedLogWriter(file_path, buffer_threshold=4096, max_lines=args.segment_lines)
+    seconds = generate_logs(writer, args.lines)
+    print(f"wrote + indexed {args.lines:,} lines in {seconds:.1f}s ({args.lines / seconds:,.0f} lines/s)")
+
+    searcher = LogSearcher(file_path)
+    queries = [["timeout"], ["error", "checkout"], ["u4242"], ["u4242", "login"], ["error", "r7", "upload"]]
+    for keywords in queries:
+        started = time.perf_counter()
+        matches = len(searcher.search(keywords))
+        indexed = time.perf_counter() - started
+        started = time.perf_counter()
+        scanned = scan_search(file_path, keywords)
+        scan = time.perf_counter() - started
+        assert matches == scanned, f"{keywords}: index found {matches}, scan found {scanned}"
+        print(f"{' + '.join(keywords):>22} | {matches:>9,} lines | index {indexed * 1000:9.1f} ms | "
+              f"scan {scan * 1000:9.1f} ms | x{scan / indexed if indexed else 0:,.0f}")
+
+    if args.dir is None:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
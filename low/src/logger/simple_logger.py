@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import Any, Callable, Optional, Union
 
 from low.src.logger.log_writers.abstract_class import LogWriter
 
@@ -10,27 +11,88 @@ class LogLevel(Enum):
     # ERROR = 4
     # CRITICAL = 5
 
+
+# message, level, written - called for every log call when set, e.g. to see why a line is missing
+DebugHook = Callable[[Any, LogLevel, bool], None]
+# formatted message, level name - called for every written line, e.g. KeywordAlerter
+Stage = Callable[[str, str], None]
+
+
 class Logger:
-    def __init__(self, log_level: LogLevel, log_writer: LogWriter):
-        self.log_level = log_level
+    """
+    A disabled call costs an attribute read and a return: the level check happens before any
+    formatting, the enabled flags are computed once per set_level, and the message is only built
+    for enabled levels - either "%"-style with args (logger.debug("user %s took %.2fs", user, t))
+    or a callable returning the message (logger.debug(lambda: expensive_dump())).
+
+    Writers with a write_record(level, template, args) method (BinaryLogWriter) get the template
+    and the raw args instead of a formatted line.
+
+    Stages (add_stage) see every written line after the writer, they must be cheap (hand the line
+    to a thread of their own) since they run on the logging thread.
+    """
+    def __init__(self, log_level: LogLevel, log_writer: LogWriter, debug_hook: Optional[DebugHook] = None):
         self.log_writer = log_writer
+        self.debug_hook = debug_hook
+        self._write_record = getattr(log_writer, "write_record", None)
+        self.stages = []
+        self.set_level(log_level)
+
+    def add_stage(self, stage: Stage) -> None:
+        self.stages.append(stage)
 
-    def log(self, message: str, log_level: LogLevel) -> bool:
-        print(f"msg: {message}, log val: {log_level.value}, check is on: {self.log_level.value}")
-        if log_level.value >= self.log_level.value:
-            print("Successfully written")
+    def set_level(self, log_level: LogLevel) -> None:
+        self.log_level = log_level
+        self.debug_enabled = LogLevel.DEBUG.value >= log_level.value
+        self.info_enabled = LogLevel.INFO.value >= log_level.value
+
+    def is_enabled_for(self, log_level: LogLevel) -> bool:
+        return log_level.value >= self.log_level.value
+
+    @staticmethod
+    def format_message(message: Union[str, Callable[[], str]], args: tuple) -> str:
+        if callable(message):
+            message = message()
+        return message % args if args else message
+
+    def log(self, message: Union[str, Callable[[], str]], log_level: LogLevel, *args) -> bool:
+        """Write the message if log_level is enabled, returns whether it was written."""
+        if log_level.value < self.log_level.value:
+            if self.debug_hook is not None:
+                self.debug_hook(message, log_level, False)
+            return False
+
+        if self._write_record is not None:
+            message = message() if callable(message) else message
+            self._write_record(log_level.value, message, args)
+            if self.stages:
+                message = self.format_message(message, args)
+        else:
+            message = self.format_message(message, args)
             self.log_writer.write_log(message)
+        for stage in self.stages:
+            stage(message, log_level.name)
+        if self.debug_hook is not None:
+            self.debug_hook(message, log_level, True)
         return True
 
-    def debug(self, message: str) -> bool:
-        message = f"[DEBUG] {message}"
-        self.log(message, LogLevel.DEBUG)
-        return True
+    def debug(self, message: Union[str, Callable[[], str]], *args) -> bool:
+        if not self.debug_enabled:
+            if self.debug_hook is not None:
+                self.debug_hook(message, LogLevel.DEBUG, False)
+            return False
+        if self._write_record is not None:
+            return self.log(message, LogLevel.DEBUG, *args)
+        return self.log(f"[DEBUG] {self.format_message(message, args)}", LogLevel.DEBUG)
 
-    def info(self, message: str) -> bool:
-        message = f"[INFO] {message}"
-        self.log(message, LogLevel.INFO)
-        return True
+    def info(self, message: Union[str, Callable[[], str]], *args) -> bool:
+        if not self.info_enabled:
+            if self.debug_hook is not None:
+                self.debug_hook(message, LogLevel.INFO, False)
+            return False
+        if self._write_record is not None:
+            return self.log(message, LogLevel.INFO, *args)
+        return self.log(f"[INFO] {self.format_message(message, args)}", LogLevel.INFO)
 
 
-# It is perfectly working code that will work
\ No newline at end of file
+# It is perfectly working code that will work
@@ -0,0 +1,78 @@
+import os
+import random
+import sys
+import tempfile
+import threading
+import unittest
+
+from low.src.logger.log_writers.file import LogWriterInFile
+from low.src.logger.log_writers.indexed import IndexedLogWriter
+
+
+def log_from_threads(writer: LogWriterInFile, threads: int, lines_per_thread: int) -> None:
+    """Every thread logs "thread<t> line<i> word<i % 7>", with a tiny switch interval to interleave them."""
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        def log_lines(thread_num: int) -> None:
+            for i in range(lines_per_thread):
+                writer.write_log(f"thread{thread_num} line{i} word{i % 7}")
+
+        workers = [threading.Thread(target=log_lines, args=(t,)) for t in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+
+class TestMultiThreadedWriters(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "log.txt")
+
+    def testLinesOfEveryThreadInOrder(self):
+        writer = LogWriterInFile(self.path, buffer_threshold=2, compression=None)
+        self.addCleanup(writer.close)
+        log_from_threads(writer, threads=8, lines_per_thread=2000)
+        writer.close()
+
+        next_line = [0] * 8
+        with open(self.path) as f:
+            for line in f:
+                thread, number, _ = line.split()
+                thread, number = int(thread[len("thread"):]), int(number[len("line"):])
+                self.assertEqual(number, next_line[thread])
+                next_line[thread] += 1
+        self.assertEqual(next_line, [2000] * 8)
+
+    def testTimeIndexSortedAndSearchComplete(self):
+        writer = IndexedLogWriter(self.path, buffer_threshold=2)
+        self.addCleanup(writer.close)
+        log_from_threads(writer, threads=8, lines_per_thread=2000)
+        writer.flush()
+
+        index = writer.active_index
+        first_ts, last_ts, offsets = list(index.batch_first_ts), list(index.batch_last_ts), list(index.batch_offset)
+        self.assertEqual(first_ts, sorted(first_ts))
+        self.assertEqual(last_ts, sorted(last_ts))
+
+        with open(self.path, "rb") as f:
+            data = f.read()
+        batch_lines = [data[start:end].decode().splitlines()
+                       for start, end in zip(offsets, offsets[1:] + [len(data)])]
+        rng = random.Random(7)
+        for _ in range(200):
+            start, end = sorted(rng.uniform(first_ts[0], last_ts[-1]) for _ in range(2))
+            # every line of the batches overlapping the range, the granularity of the time index
+            expected = [line for i, lines in enumerate(batch_lines)
+                        if last_ts[i] >= start and first_ts[i] <= end
+                        for line in lines if "word3" in line.split()]
+            found = [line for _, _, line in writer.search(["word3"], start, end)]
+            self.assertEqual(found, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
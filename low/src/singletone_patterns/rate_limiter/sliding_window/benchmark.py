@@ -0,0 +1,62 @@
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+
+from low.src.singletone_patterns.rate_limiter.sliding_window.limiter import SlidingWindowRateLimiter
+
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # bytes on macOS, KB on Linux
+
+
+def run_algorithm(algorithm: str, keys: int, requests_per_key: int, window_max_size: int, interval: int) -> dict:
+    """Runs in a fresh process, so the peak RSS growth is this algorithm's state only."""
+    request_ids = [f"user-{i}" for i in range(keys)]
+    limiter = SlidingWindowRateLimiter(window_max_size=window_max_size, window_time_interval_in_seconds=interval,
+                                       algorithm=algorithm, verbose=False)
+    rss_before = peak_rss_bytes()
+
+    allowed = 0
+    now = time.time()
+    started = time.perf_counter()
+    for round_num in range(requests_per_key):
+        timestamp = now + round_num * 0.001
+        for request_id in request_ids:
+            allowed += limiter.is_request_allowed(request_id=request_id, request_timestamp=timestamp)
+    elapsed = time.perf_counter() - started
+
+    rss_after = peak_rss_bytes()
+    limiter.stop_bg_tasks()
+    decisions = keys * requests_per_key
+    return {
+        "algorithm": algorithm,
+        "decisions_per_sec": decisions / elapsed,
+        "bytes_per_key": (rss_after - rss_before) / keys,
+        "allowed": allowed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="decisions/s and memory per key of the limiter algorithms")
+    parser.add_argument("--keys", type=int, default=1_000_000)
+    parser.add_argument("--requests-per-key", type=int, default=5)
+    parser.add_argument("--window-max-size", type=int, default=100)
+    parser.add_argument("--interval", type=int, default=60)
+    parser.add_argument("--algorithms", nargs="+", default=list(SlidingWindowRateLimiter.ALGORITHMS))
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    for algorithm in args.algorithms:
+        with context.Pool(1) as pool:
+            result = pool.apply(run_algorithm, (algorithm, args.keys, args.requests_per_key,
+                                                args.window_max_size, args.interval))
+        print(f"{result['algorithm']:>8} | {args.keys:,} keys x {args.requests_per_key} requests | "
+              f"{result['decisions_per_sec']:>10,.0f} decisions/s | {result['bytes_per_key']:>6,.0f} bytes/key "
+              f"(dict entry included) | {result['allowed']:,} allowed")
+
+
+if __name__ == "__main__":
+    main()
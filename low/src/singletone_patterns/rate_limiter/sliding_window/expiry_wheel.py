@@ -0,0 +1,42 @@
+import math
+from typing import Dict, List
+
+
+class ExpiryWheel:
+    """
+    Timing wheel of keys by expiry time: one bucket per resolution_in_seconds tick, buckets keyed
+    by their absolute tick number so any expiry fits without a second level.
+
+    schedule() is a dict lookup and an append, pop_expired(now) empties the buckets of the ticks
+    that passed since the previous call: the cost is the expired keys (plus the elapsed ticks), not
+    the keys in the wheel. A key is never returned before its expiry, at most one tick after it.
+    Not thread safe, the owner locks it.
+    """
+    def __init__(self, resolution_in_seconds: float, now: float):
+        self._resolution = resolution_in_seconds
+        self._buckets: Dict[int, List[str]] = {}
+        self._next_tick = int(now // resolution_in_seconds)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def schedule(self, key: str, expires_at: float) -> None:
+        # a bucket is due once its tick has started, so round up; an expiry already passed goes to the next pop
+        tick = max(math.ceil(expires_at / self._resolution), self._next_tick)
+        bucket = self._buckets.get(tick)
+        if bucket is None:
+            bucket = self._buckets[tick] = []
+        bucket.append(key)
+        self._size += 1
+
+    def pop_expired(self, now: float) -> List[str]:
+        last_tick = int(now // self._resolution)
+        expired = []
+        for tick in range(self._next_tick, last_tick + 1):
+            bucket = self._buckets.pop(tick, None)
+            if bucket is not None:
+                expired.extend(bucket)
+        self._next_tick = max(self._next_tick, last_tick + 1)
+        self._size -= len(expired)
+        return expired
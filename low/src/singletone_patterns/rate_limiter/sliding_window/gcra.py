@@ -0,0 +1,57 @@
+class GcraWindow:
+    """
+    Generic cell rate algorithm: the token bucket written as a single timestamp.
+
+    Requests are spaced by emission_interval = interval / window_max_size, tat ("theoretical arrival
+    time") is when the key would be back to an empty bucket. A request is allowed when, after adding
+    its emission interval, tat is at most one interval ahead of now: a burst of up to window_max_size
+    requests, then one request per emission interval as capacity comes back. Unlike the log, a
+    burst right after a full refill can put up to 2 * window_max_size requests in one sliding interval.
+    Two numbers per key, updates are O(1): the latest request and tat - latest, the backlog. Summing
+    emission intervals onto an epoch timestamp would lose most of their precision (adjacent floats
+    are ~2.4e-7 apart near 1.7e9), the backlog stays within [0, interval].
+    """
+    __slots__ = ("_window_max_size", "_interval", "_emission_interval", "_backlog", "_latest")
+
+    def __init__(self, window_max_size: int, window_time_interval_in_seconds: int):
+        self._window_max_size = window_max_size
+        self._interval = window_time_interval_in_seconds
+        self._emission_interval = window_time_interval_in_seconds / window_max_size
+        self._backlog = 0.0
+        self._latest = -1.0
+
+    def get_sliding_window_max_size(self) -> int:
+        return self._window_max_size
+
+    def get_window_time_interval_in_seconds(self) -> int:
+        return self._interval
+
+    def is_empty(self) -> bool:
+        return self._latest < 0
+
+    def get_no_requests_in_window(self) -> int:
+        """Requests still counted against the key as of its latest request."""
+        if self.is_empty():
+            return 0
+        return max(0, round(self._backlog / self._emission_interval))
+
+    def is_full(self) -> bool:
+        return self.get_no_requests_in_window() >= self._window_max_size
+
+    def clear_older_requests(self, timestamp: float) -> None:
+        # a key idle since timestamp (2 intervals ago for the limiter) has its bucket refilled, same as a new key
+        if self._latest <= timestamp:
+            self._backlog, self._latest = 0.0, -1.0
+
+    def add_request(self, request_timestamp: float) -> bool:
+        # tat - request_timestamp, the difference of two close epoch timestamps is exact
+        backlog = 0.0 if self._latest < 0 else max(0.0, self._backlog - (request_timestamp - self._latest))
+        backlog += self._emission_interval
+        if backlog > self._interval + 1e-9:  # float error of summing emission intervals
+            return False
+        self._backlog = backlog
+        self._latest = request_timestamp
+        return True
+
+    def get_latest_request_timestamp(self) -> float:
+        return self._latest
@@ -1,63 +1,146 @@
 import time
 import threading
+from contextlib import nullcontext
 
+from low.src.singletone_patterns.rate_limiter.sliding_window.expiry_wheel import ExpiryWheel
+from low.src.singletone_patterns.rate_limiter.sliding_window.gcra import GcraWindow
 from low.src.singletone_patterns.rate_limiter.sliding_window.sliding_window import SlidingWindow
+from low.src.singletone_patterns.rate_limiter.sliding_window.sliding_window_counter import SlidingWindowCounter
+
 
 class SlidingWindowRateLimiter:
-    def __init__(self, window_max_size: int, window_time_interval_in_seconds: int):
-        print("[SlidingWindowRateLimiter] Initializing")
+    """
+    Per request id rate limiter, algorithm picks the per key state:
+        "log":     SlidingWindow, every request timestamp in a deque - exact, memory grows with window_max_size
+        "counter": SlidingWindowCounter, weighted previous + current fixed window counts - a few numbers per key
+        "gcra":    GcraWindow, token bucket as one theoretical arrival time - a few numbers per key
+    verbose=False silences the per request and background task prints.
+
+    concurrent=True makes it safe to call from many request threads: the key space is split into
+    `shards` dicts, each with its own lock, a request only locks the shard of its request id (check
+    and update under the same lock, so a key is never over admitted) and the background cleanup
+    walks one shard at a time. Without it there is a single shard and no locking.
+
+    A key is evicted once it has had no request for 2 intervals. Every shard keeps its keys in an
+    ExpiryWheel by that deadline (one entry per key, added when the key is created), so a cleanup
+    tick only looks at the keys whose deadline passed: idle ones are deleted, the ones that got
+    requests meanwhile are put back at their new deadline. print_cache() dumps the cache on demand,
+    the ticks only print a summary line.
+    """
+    EXPIRY_RESOLUTION_IN_SECONDS = 1.0
+    ALGORITHMS = {
+        "log": SlidingWindow,
+        "counter": SlidingWindowCounter,
+        "gcra": GcraWindow,
+    }
+
+    def __init__(self, window_max_size: int, window_time_interval_in_seconds: int, algorithm: str = "log",
+                 verbose: bool = True, concurrent: bool = False, shards: int = 16):
+        if algorithm not in self.ALGORITHMS:
+            raise ValueError(f"unknown algorithm: {algorithm}, expected one of {list(self.ALGORITHMS)}")
+        if shards < 1:
+            raise ValueError(f"shards must be at least 1, got {shards}")
+        self.verbose = verbose
+        if self.verbose:
+            print("[SlidingWindowRateLimiter] Initializing")
+        self.__window_class = self.ALGORITHMS[algorithm]
         self.__window_max_size = window_max_size
         self.__window_time_interval_in_seconds = window_time_interval_in_seconds
-        self.__in_memory_cache = {} # TODO: implement a smart and robut in-memory cache
+        self.concurrent = concurrent
+        self.__shard_count = shards if concurrent else 1
+        # shard i: request id -> window, guarded by __shard_locks[i]
+        self.__shards = [{} for _ in range(self.__shard_count)]
+        self.__shard_locks = [threading.Lock() if concurrent else nullcontext() for _ in range(self.__shard_count)]
+        now = time.time()
+        self.__shard_expiries = [ExpiryWheel(self.EXPIRY_RESOLUTION_IN_SECONDS, now) for _ in range(self.__shard_count)]
 
         self.__stop_bg_tasks = False
         self._bg_tasks = threading.Thread(target=self.run_bg_tasks, daemon=True)
         self._bg_tasks.start()
 
+    def get_window_max_size(self) -> int:
+        return self.__window_max_size
+
     def get_window_time_interval_in_seconds(self) -> int:
         return self.__window_time_interval_in_seconds
 
+    def _shard_index(self, request_id: str) -> int:
+        return hash(request_id) % self.__shard_count
+
     def is_request_id_present_in_cache(self, request_id: str) -> bool:
-        return request_id in self.__in_memory_cache
+        return request_id in self.__shards[self._shard_index(request_id)]
     
     def get_new_sliding_window(self) -> SlidingWindow:
-        return SlidingWindow(window_max_size=self.__window_max_size, window_time_interval_in_seconds=self.__window_time_interval_in_seconds)
+        return self.__window_class(window_max_size=self.__window_max_size, window_time_interval_in_seconds=self.__window_time_interval_in_seconds)
+
+    def _add_window(self, shard_index: int, request_id: str, timestamp: float) -> SlidingWindow:
+        window = self.__shards[shard_index][request_id] = self.get_new_sliding_window()
+        self.__shard_expiries[shard_index].schedule(request_id, timestamp + 2*self.get_window_time_interval_in_seconds())
+        return window
 
+    # each takes the shard lock on its own, is_request_allowed does both under a single lock instead
     def register_request_in_cache_if_not_already_registered(self, request_id: str) -> bool:
-        if self.is_request_id_present_in_cache(request_id=request_id):
-            return True
-        
-        self.__in_memory_cache[request_id] = self.get_new_sliding_window()
+        shard_index = self._shard_index(request_id)
+        with self.__shard_locks[shard_index]:
+            if request_id not in self.__shards[shard_index]:
+                self._add_window(shard_index, request_id, time.time())
         return True
     
     def update_in_memory_cache(self, request_id: str, request_timestamp: float) -> True:
-        return self.__in_memory_cache[request_id].add_request(request_timestamp=request_timestamp)
+        shard_index = self._shard_index(request_id)
+        with self.__shard_locks[shard_index]:
+            return self.__shards[shard_index][request_id].add_request(request_timestamp=request_timestamp)
 
     def is_request_allowed(self, request_id: str, request_timestamp: float) -> bool:
-        self.register_request_in_cache_if_not_already_registered(request_id=request_id)
-        req_allow_statue = self.update_in_memory_cache(request_id=request_id, request_timestamp=request_timestamp)
+        shard_index = self._shard_index(request_id)
+        with self.__shard_locks[shard_index]:
+            shard = self.__shards[shard_index]
+            window = shard.get(request_id)
+            if window is None:
+                window = self._add_window(shard_index, request_id, request_timestamp)
+            req_allow_statue = window.add_request(request_timestamp=request_timestamp)
+        if not self.verbose:
+            return req_allow_statue
         if req_allow_statue:
             print(f"[SlidingWindowRateLimiter] Request {request_id} allowed")
         else:
             print(f"[SlidingWindowRateLimiter] Request {request_id} not allowed")
         return req_allow_statue
     
+    def get_no_request_ids_in_cache(self) -> int:
+        return sum(len(shard) for shard in self.__shards)
+
     def print_cache(self):
-        print(f"[SlidingWindowRateLimiter] Printing cache, {len(self.__in_memory_cache)} request ids in cache")
-        for request_id in self.__in_memory_cache:
-            print(f"[SlidingWindowRateLimiter] Request {request_id} has {self.__in_memory_cache[request_id].get_no_requests_in_window()} requests")
+        print(f"[SlidingWindowRateLimiter] Printing cache, {self.get_no_request_ids_in_cache()} request ids in cache")
+        for shard, lock in zip(self.__shards, self.__shard_locks):
+            with lock:
+                counts = [(request_id, window.get_no_requests_in_window()) for request_id, window in shard.items()]
+            for request_id, count in counts:
+                print(f"[SlidingWindowRateLimiter] Request {request_id} has {count} requests")
     
     def clear_inactive_request_ids(self):
-        print("[Bg_Task] Clearing inactive request ids")
-        ids_in_cache = list(self.__in_memory_cache.keys())
-        for request_id in ids_in_cache:
-            self.__in_memory_cache[request_id].clear_older_requests(timestamp=time.time() - 2*self.get_window_time_interval_in_seconds())
-            if self.__in_memory_cache[request_id].is_empty():
-                del self.__in_memory_cache[request_id]
-
-        self.print_cache()
+        if self.verbose:
+            print("[Bg_Task] Clearing inactive request ids")
+        inactive_after = 2*self.get_window_time_interval_in_seconds()
+        checked = evicted = 0
+        for shard, lock, expiries in zip(self.__shards, self.__shard_locks, self.__shard_expiries):
+            # one shard locked at a time, requests to the other shards go on meanwhile
+            with lock:
+                now = time.time()
+                expired = expiries.pop_expired(now)
+                for request_id in expired:
+                    window = shard[request_id]
+                    window.clear_older_requests(timestamp=now - inactive_after)
+                    if window.is_empty():
+                        del shard[request_id]
+                        evicted += 1
+                    else:
+                        expiries.schedule(request_id, window.get_latest_request_timestamp() + inactive_after)
+                checked += len(expired)
 
-        print("[Bg_Task] Cleared inactive request ids")
+        if self.verbose:
+            print(f"[Bg_Task] Cleared inactive request ids: {evicted} evicted of {checked} due, "
+                  f"{self.get_no_request_ids_in_cache()} request ids in cache")
 
     def run_bg_tasks(self):
         while self.__stop_bg_tasks is False:
@@ -65,9 +148,11 @@ class SlidingWindowRateLimiter:
             self.clear_inactive_request_ids()
 
     def stop_bg_tasks(self):
-        print("Stopping background tasks")
+        if self.verbose:
+            print("Stopping background tasks")
         self.__stop_bg_tasks = True
         self._bg_tasks.join()
-        print("Background tasks stopped")
+        if self.verbose:
+            print("Background tasks stopped")
 
         
\ No newline at end of file
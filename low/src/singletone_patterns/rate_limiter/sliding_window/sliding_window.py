@@ -35,7 +35,6 @@ class SlidingWindow:
             return False
         
         self.__dequeue.append(request_timestamp)
-        print(f"added request in sliding window, size is updated to : {self.get_no_requests_in_window()}")
         return True
     
     def get_latest_request_timestamp(self) -> float:
@@ -0,0 +1,64 @@
+class SlidingWindowCounter:
+    """
+    Sliding window approximated with two fixed windows: the count of the current window plus the
+    count of the previous one weighted by how much of it the sliding window still covers.
+
+        estimate = previous * (1 - elapsed_in_current / interval) + current
+
+    A few numbers per key whatever window_max_size is, instead of one timestamp per request.
+    Assumes the requests are evenly spread over the previous window, so it can be off by a fraction
+    of the previous window's count, never by more than window_max_size.
+    """
+    __slots__ = ("_window_max_size", "_interval", "_window_start", "_current", "_previous", "_latest")
+
+    def __init__(self, window_max_size: int, window_time_interval_in_seconds: int):
+        self._window_max_size = window_max_size
+        self._interval = window_time_interval_in_seconds
+        self._window_start = 0.0
+        self._current = 0
+        self._previous = 0
+        self._latest = -1.0
+
+    def get_sliding_window_max_size(self) -> int:
+        return self._window_max_size
+
+    def get_window_time_interval_in_seconds(self) -> int:
+        return self._interval
+
+    def is_empty(self) -> bool:
+        return self._latest < 0
+
+    def _roll(self, timestamp: float) -> float:
+        """Move the fixed windows up to timestamp, returns the weight of the previous window."""
+        window_start = timestamp - timestamp % self._interval
+        if window_start != self._window_start:
+            adjacent = window_start - self._window_start == self._interval
+            self._previous = self._current if adjacent else 0
+            self._current = 0
+            self._window_start = window_start
+        return 1.0 - (timestamp - window_start) / self._interval
+
+    def get_no_requests_in_window(self) -> int:
+        if self.is_empty():
+            return 0
+        weight = 1.0 - (self._latest - self._window_start) / self._interval
+        return int(self._previous * weight) + self._current
+
+    def is_full(self) -> bool:
+        return self.get_no_requests_in_window() >= self._window_max_size
+
+    def clear_older_requests(self, timestamp: float) -> None:
+        # nothing to trim request by request, the key is empty once its last request is that old
+        if self._latest <= timestamp:
+            self._window_start, self._current, self._previous, self._latest = 0.0, 0, 0, -1.0
+
+    def add_request(self, request_timestamp: float) -> bool:
+        weight = self._roll(request_timestamp)
+        if self._previous * weight + self._current >= self._window_max_size:
+            return False
+        self._current += 1
+        self._latest = request_timestamp
+        return True
+
+    def get_latest_request_timestamp(self) -> float:
+        return self._latest
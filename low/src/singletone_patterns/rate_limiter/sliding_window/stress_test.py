@@ -0,0 +1,83 @@
+import argparse
+import sys
+import threading
+import time
+from collections import Counter
+
+from low.src.singletone_patterns.rate_limiter.sliding_window.limiter import SlidingWindowRateLimiter
+
+
+def run_stress(limiter: SlidingWindowRateLimiter, threads: int, keys: int, requests_per_thread: int) -> dict:
+    """
+    threads hammer the same keys with timestamps inside one window: whatever the interleaving, each
+    key must get at most window_max_size requests allowed.
+    """
+    request_ids = [f"user-{i}" for i in range(keys)]
+    timestamp = time.time()
+    allowed_per_thread = [Counter() for _ in range(threads)]
+    start = threading.Barrier(threads + 1)
+
+    def hammer(thread_num: int) -> None:
+        allowed = allowed_per_thread[thread_num]
+        is_request_allowed = limiter.is_request_allowed
+        start.wait()
+        for i in range(requests_per_thread):
+            request_id = request_ids[(i + thread_num) % keys]
+            if is_request_allowed(request_id=request_id, request_timestamp=timestamp):
+                allowed[request_id] += 1
+
+    workers = [threading.Thread(target=hammer, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    start.wait()
+    started = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    allowed = sum(allowed_per_thread, Counter())
+    window_max_size = limiter.get_window_max_size()
+    return {
+        "decisions_per_sec": threads * requests_per_thread / elapsed,
+        "max_allowed_per_key": max(allowed.values(), default=0),
+        "over_admitted_keys": sum(1 for request_id in request_ids if allowed[request_id] > window_max_size),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="multi-threaded correctness and throughput of the concurrent limiter")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--requests-per-thread", type=int, default=200_000)
+    parser.add_argument("--window-max-size", type=int, default=50)
+    parser.add_argument("--shards", type=int, default=16)
+    parser.add_argument("--algorithms", nargs="+", default=list(SlidingWindowRateLimiter.ALGORITHMS))
+    parser.add_argument("--unlocked", action="store_true", help="also run without concurrent=True, for comparison")
+    parser.add_argument("--switch-interval", type=float, default=None,
+                        help="sys.setswitchinterval, small values switch threads more often and expose races")
+    args = parser.parse_args()
+
+    if args.switch_interval is not None:
+        sys.setswitchinterval(args.switch_interval)
+    modes = [True, False] if args.unlocked else [True]
+    failed = False
+    for algorithm in args.algorithms:
+        for concurrent in modes:
+            for threads in args.threads:
+                limiter = SlidingWindowRateLimiter(window_max_size=args.window_max_size,
+                                                   window_time_interval_in_seconds=60, algorithm=algorithm,
+                                                   verbose=False, concurrent=concurrent, shards=args.shards)
+                result = run_stress(limiter, threads, args.keys, args.requests_per_thread)
+                limiter.stop_bg_tasks()
+                mode = f"{args.shards} shards" if concurrent else "unlocked"
+                print(f"{algorithm:>8} | {mode:>10} | {threads:>3} threads | "
+                      f"{result['decisions_per_sec']:>10,.0f} decisions/s | "
+                      f"max {result['max_allowed_per_key']} allowed per key (limit {args.window_max_size}) | "
+                      f"{result['over_admitted_keys']} keys over admitted")
+                failed |= concurrent and result["over_admitted_keys"] > 0
+    if failed:
+        sys.exit("concurrent limiter over admitted")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import random
+import time
+import unittest
+
+from low.src.singletone_patterns.rate_limiter.sliding_window.gcra import GcraWindow
+from low.src.singletone_patterns.rate_limiter.sliding_window.limiter import SlidingWindowRateLimiter
+
+
+class TestGcraWindow(unittest.TestCase):
+    """Epoch second timestamps, as the limiter gets them from time.time()."""
+    def testBurstAtEpochTimestamps(self):
+        rng = random.Random(3)
+        for _ in range(200):
+            window = GcraWindow(window_max_size=50, window_time_interval_in_seconds=60)
+            now = time.time() + rng.uniform(-1e6, 1e6)
+            allowed = [window.add_request(request_timestamp=now) for _ in range(60)]
+            self.assertEqual(allowed, [True] * 50 + [False] * 10)
+
+    def testRefillAtEpochTimestamps(self):
+        window = GcraWindow(window_max_size=3, window_time_interval_in_seconds=1)
+        now = 1.7e9
+        self.assertEqual([window.add_request(request_timestamp=now) for _ in range(5)], [True, True, True, False, False])
+        # one emission interval (1/3 s, plus the float step of the timestamp) later exactly one more fits
+        later = now + 1 / 3 + 1e-6
+        self.assertEqual([window.add_request(request_timestamp=later) for _ in range(2)], [True, False])
+        # a whole interval later the bucket is full again
+        later = now + 2
+        self.assertEqual([window.add_request(request_timestamp=later) for _ in range(4)], [True, True, True, False])
+
+    def testSteadyRateAtEpochTimestamps(self):
+        window = GcraWindow(window_max_size=10, window_time_interval_in_seconds=60)
+        start = time.time()
+        for _ in range(10):
+            window.add_request(request_timestamp=start)
+        # after the burst one request per emission interval (6 s) for an hour
+        self.assertTrue(all(window.add_request(request_timestamp=start + 6 * i) for i in range(1, 600)))
+
+    def testLimiterBurst(self):
+        limiter = SlidingWindowRateLimiter(window_max_size=50, window_time_interval_in_seconds=60, algorithm="gcra",
+                                           verbose=False)
+        now = time.time()
+        self.assertEqual(sum(limiter.is_request_allowed(request_id="user", request_timestamp=now) for _ in range(60)), 50)
+        limiter.stop_bg_tasks()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+from benchmark_registry import BENCHMARKS, BenchmarkCase
+
+
+def _maxrss_mb(who: int) -> float:
+    max_rss = resource.getrusage(who).ru_maxrss
+    if sys.platform == "darwin":  # bytes on macOS, KB on linux
+        return max_rss / (1024 * 1024)
+    return max_rss / 1024
+
+
+def _children_cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _io_counters() -> Optional[Dict[str, int]]:
+    try:
+        with open("/proc/self/io", "r") as f:
+            counters = dict(line.split(": ") for line in f.read().splitlines())
+        return {"bytes_read": int(counters["rchar"]), "bytes_written": int(counters["wchar"])}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _measure(case: BenchmarkCase) -> dict:
+    io_before = _io_counters()
+    children_cpu_before = _children_cpu_seconds()
+    cpu_before = time.process_time()
+    start_time = time.perf_counter()
+
+    result = case.func(**case.kwargs) or {}
+
+    wall = time.perf_counter() - start_time
+    cpu = (time.process_time() - cpu_before) + (_children_cpu_seconds() - children_cpu_before)
+    io_after = _io_counters()
+
+    run = {
+        "wall_seconds": wall,
+        "cpu_seconds": cpu,
+        "peak_rss_mb": _maxrss_mb(resource.RUSAGE_SELF),
+        "children_peak_rss_mb": _maxrss_mb(resource.RUSAGE_CHILDREN),
+        "rows": result.get("rows"),
+        "bytes_read": result.get("bytes_read"),
+        "bytes_written": result.get("bytes_written"),
+    }
+    if io_before is not None and io_after is not None:
+        for key in ("bytes_read", "bytes_written"):
+            if run[key] is None:
+                run[key] = io_after[key] - io_before[key]
+    run["rows_per_sec"] = run["rows"] / wall if run["rows"] and wall else None
+    return run
+
+
+def _measure_in_child(case: BenchmarkCase, conn) -> None:
+    conn.send(_measure(case))
+    conn.close()
+
+
+def run_once(case: BenchmarkCase) -> dict:
+    """
+    One run in a fresh spawned process: ru_maxrss only ever grows within a process, so that is the
+    only way peak_rss_mb is this run's peak and not the highest of every run before it. Not a pool
+    worker, those are daemonic and the experiments start processes of their own.
+    """
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_measure_in_child, args=(case, sender), name=f"benchmark-{case.name}")
+    process.start()
+    sender.close()
+    try:
+        return receiver.recv()
+    except EOFError:
+        process.join()
+        raise RuntimeError(f"benchmark case {case.name} failed, its process exited with code {process.exitcode}")
+    finally:
+        receiver.close()
+        process.join()
+
+
+def run_benchmark(case: BenchmarkCase, repeats: int = 3, warmup: int = 1) -> dict:
+    """
+    warmup runs are executed and dropped, then repeats measured runs are summarised by their median.
+    Every run has a process of its own, warm-ups only warm what outlives it (page cache, files).
+    """
+    for i in range(warmup):
+        print(f"[benchmark] {case.name}: warm-up {i + 1}/{warmup}")
+        run_once(case)
+
+    runs = []
+    for i in range(repeats):
+        print(f"[benchmark] {case.name}: run {i + 1}/{repeats}")
+        runs.append(run_once(case))
+
+    summary = {"case": case.name, "repeats": repeats, "warmup": warmup}
+    for key in runs[0]:
+        values = [run[key] for run in runs if run[key] is not None]
+        summary[key] = statistics.median(values) if values else None
+    summary["wall_seconds_min"] = min(run["wall_seconds"] for run in runs)
+    summary["wall_seconds_max"] = max(run["wall_seconds"] for run in runs)
+    summary["runs"] = runs
+    return summary
+
+
+def save_results(results: List[dict], path: str) -> None:
+    """path.json keeps every run, path.csv one summary row per case."""
+    metadata = {"created_at": time.time(), "python": platform.python_version(),
+                "platform": platform.platform(), "cpu_count": os.cpu_count()}
+    with open(f"{path}.json", "w") as f:
+        json.dump({"metadata": metadata, "results": results}, f, indent=2)
+
+    columns = [key for key in results[0] if key != "runs"] if results else []
+    with open(f"{path}.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def compare_with_baseline(results: List[dict], baseline_path: str, tolerance: float = 0.10) -> List[str]:
+    """
+    Flag cases whose median wall time or peak RSS grew by more than tolerance over the baseline json.
+    Returns the regression messages, cases missing from the baseline are skipped.
+    """
+    with open(baseline_path, "r") as f:
+        baseline = {entry["case"]: entry for entry in json.load(f)["results"]}
+
+    regressions = []
+    for result in results:
+        previous = baseline.get(result["case"])
+        if previous is None:
+            continue
+        for metric in ("wall_seconds", "peak_rss_mb"):
+            if not previous.get(metric) or result.get(metric) is None:
+                continue
+            change = result[metric] / previous[metric] - 1
+            status = "REGRESSION" if change > tolerance else "ok"
+            print(f"[benchmark] {result['case']:<28} {metric:<14} {previous[metric]:>10.2f} -> "
+                  f"{result[metric]:>10.2f} ({change:+.1%}) {status}")
+            if change > tolerance:
+                regressions.append(f"{result['case']} {metric} {change:+.1%}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import large_file_processor  # noqa: F401, registers the experiments
+
+    parser = argparse.ArgumentParser(description="Run registered experiments as benchmarks")
+    parser.add_argument("cases", nargs="*", help=f"cases to run, default all of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--output", default="benchmark_results", help="writes <output>.json and <output>.csv")
+    parser.add_argument("--baseline", help="results json of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.cases if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown cases: {unknown}, registered: {list(BENCHMARKS)}")
+
+    results = [
+        run_benchmark(BENCHMARKS[name], repeats=args.repeats, warmup=args.warmup)
+        for name in (args.cases or BENCHMARKS)
+    ]
+    save_results(results, args.output)
+    print(f"[benchmark] results written to {args.output}.json / {args.output}.csv")
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, tolerance=args.tolerance)
+        if regressions:
+            print(f"[benchmark] {len(regressions)} regressions: {regressions}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
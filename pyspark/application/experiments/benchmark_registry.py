@@ -0,0 +1,26 @@
+from typing import Callable, Dict, Optional
+
+
+class BenchmarkCase:
+    """
+    A registered experiment. func may return a dict with any of rows, bytes_read, bytes_written,
+    those win over the /proc/self/io counters (which miss worker processes and are linux only).
+    """
+    def __init__(self, name: str, func: Callable[..., Optional[dict]], kwargs: Optional[Dict[str, object]] = None):
+        self.name = name
+        self.func = func
+        self.kwargs = kwargs or {}
+
+
+# lives apart from benchmark.py: `python benchmark.py` runs that file as __main__, experiments
+# importing the registry from it would fill a second copy of the module
+BENCHMARKS: Dict[str, BenchmarkCase] = {}
+
+
+def register_benchmark(name: Optional[str] = None, **kwargs):
+    """Decorator registering an experiment as a benchmark case, the function itself is unchanged."""
+    def decorator(func):
+        case_name = name or func.__name__
+        BENCHMARKS[case_name] = BenchmarkCase(name=case_name, func=func, kwargs=kwargs)
+        return func
+    return decorator
@@ -0,0 +1,95 @@
+import json
+import os
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+
+
+PART_NUMBER = re.compile(r"^part-(\d+)")
+
+
+def file_crc32(path: str, block_size: int = 8 * 1024 * 1024) -> int:
+    crc = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            crc = zlib.crc32(block, crc)
+    return crc
+
+
+class CheckpointManifest:
+    """
+    _manifest.json in the output directory of a chunked job whose chunks are read in order:
+        {"job": {...}, "chunks": {"<chunk_num>": {"start", "end", "rows", "files": [{"path", "size", "crc32"}]}}}
+
+    A chunk is committed once its part files are complete, the manifest is rewritten atomically
+    (tmp + fsync + rename) on every commit. A manifest written for another `job` is ignored.
+    Part files are named part-<chunk_num>..., that's how partial outputs are found.
+
+    The sequential part of work/massive_file_processor's manifest (same file format), the
+    experiments run as scripts from this directory and don't import across project trees.
+    """
+    FILE_NAME = "_manifest.json"
+
+    def __init__(self, output_dir: str, job: dict):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, self.FILE_NAME)
+        self.job = job
+        self.chunks: Dict[int, dict] = {}
+        self._lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                manifest = json.load(f)
+            if manifest.get("job") == self.job:
+                self.chunks = {int(chunk_num): entry for chunk_num, entry in manifest["chunks"].items()}
+            else:
+                print(f"[CheckpointManifest] {self.path} belongs to another job, starting from scratch")
+
+    def _save(self) -> None:
+        manifest = {"job": self.job, "chunks": {str(n): entry for n, entry in sorted(self.chunks.items())}}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(json.dumps(manifest))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def commit(self, chunk_num: int, start: int, end: int, files: List[str], rows: int) -> None:
+        """Record a finished chunk, files are paths of its (already complete) part files."""
+        entry = {"start": start, "end": end, "rows": rows, "files": [
+            {"path": os.path.relpath(path, self.output_dir), "size": os.path.getsize(path), "crc32": file_crc32(path)}
+            for path in files
+        ]}
+        with self._lock:
+            self.chunks[chunk_num] = entry
+            self._save()
+
+    def _intact(self, chunk_num: int) -> bool:
+        return all(
+            os.path.exists(path) and os.path.getsize(path) == part["size"]
+            for part in self.chunks[chunk_num]["files"]
+            for path in [os.path.join(self.output_dir, part["path"])]
+        )
+
+    def resume_point(self) -> Tuple[int, Optional[int]]:
+        """(first chunk to process, byte offset to continue from) after the committed, intact chunks 0..n-1."""
+        chunk_num, offset = 0, None
+        while chunk_num in self.chunks and self._intact(chunk_num):
+            offset = self.chunks[chunk_num]["end"]
+            chunk_num += 1
+        return chunk_num, offset
+
+    def discard_uncommitted(self, keep: Set[int]) -> None:
+        """Drop manifest entries outside keep and delete their part files and any *.tmp leftovers."""
+        with self._lock:
+            self.chunks = {chunk_num: entry for chunk_num, entry in self.chunks.items() if chunk_num in keep}
+            self._save()
+        for root, _, files in os.walk(self.output_dir):
+            for name in files:
+                match = PART_NUMBER.match(name)
+                if name.endswith(".tmp") or (match and int(match.group(1)) not in keep):
+                    os.remove(os.path.join(root, name))
+
+    def committed_rows(self) -> int:
+        return sum(entry["rows"] for entry in self.chunks.values())
@@ -0,0 +1,135 @@
+import glob
+import os
+from typing import List, Optional
+
+import pandas as pd
+
+from schema_cache import schema_registry
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # parquet output is optional, csv paths keep working without pyarrow
+    pa = None
+    pq = None
+
+
+OUTPUT_FORMATS = ("csv", "parquet")
+DEFAULT_ROW_GROUP_SIZE = 1_000_000
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("parquet output needs pyarrow, install it with `pip install pyarrow`")
+
+
+def check_output_format(output_format: str) -> None:
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"unknown output format: {output_format}, expected one of {OUTPUT_FORMATS}")
+
+
+def skewed_arrow_schema() -> "pa.Schema":
+    _require_pyarrow()
+    return pa.schema([
+        ("id", pa.int64()),
+        ("department", pa.string()),
+        ("region", pa.string()),
+        ("employee_name", pa.string()),
+        ("salary", pa.int32()),
+        ("bonus", pa.int32()),
+        ("years_exp", pa.int16()),
+        ("performance", pa.float64()),
+        ("transactions", pa.int32()),
+    ])
+
+
+def skewed_spark_schema():
+    """Same columns as skewed_arrow_schema, for spark.read.csv(schema=...) without inferSchema."""
+    from pyspark.sql.types import (DoubleType, IntegerType, LongType, ShortType, StringType,
+                                   StructField, StructType)
+    return StructType([
+        StructField("id", LongType()),
+        StructField("department", StringType()),
+        StructField("region", StringType()),
+        StructField("employee_name", StringType()),
+        StructField("salary", IntegerType()),
+        StructField("bonus", IntegerType()),
+        StructField("years_exp", ShortType()),
+        StructField("performance", DoubleType()),
+        StructField("transactions", IntegerType()),
+    ])
+
+
+def write_parquet(table: "pa.Table",
+                  path: str,
+                  part_name: str,
+                  partition_cols: Optional[List[str]] = None,
+                  row_group_size: int = DEFAULT_ROW_GROUP_SIZE) -> List[str]:
+    """
+    Write one part of a parquet dataset rooted at `path` and return the files written.
+
+    Without partition_cols the part goes to path/part_name.parquet (written to a tmp file and renamed),
+    with partition_cols it is split into hive style path/department=.../region=.../part_name-<i>.parquet
+    directories. Part names are unique per writer so parallel writers never touch the same file.
+    """
+    _require_pyarrow()
+    os.makedirs(path, exist_ok=True)
+    if partition_cols:
+        pq.write_to_dataset(
+            table,
+            root_path=path,
+            partition_cols=partition_cols,
+            basename_template=f"{part_name}-{{i}}.parquet",
+            row_group_size=row_group_size,
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        return sorted(glob.glob(os.path.join(path, "**", f"{part_name}-*.parquet"), recursive=True))
+
+    part_path = os.path.join(path, f"{part_name}.parquet")
+    pq.write_table(table, part_path + ".tmp", row_group_size=row_group_size)
+    os.replace(part_path + ".tmp", part_path)
+    return [part_path]
+
+
+def dataframe_to_table(df: pd.DataFrame, schema: Optional["pa.Schema"] = None) -> "pa.Table":
+    _require_pyarrow()
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+def convert_csv_to_parquet(csv_path: str,
+                           parquet_path: str,
+                           chunk_size: int = 1_000_000,
+                           schema: Optional["pa.Schema"] = None,
+                           partition_cols: Optional[List[str]] = None,
+                           row_group_size: int = DEFAULT_ROW_GROUP_SIZE) -> int:
+    """
+    One time conversion of an existing csv (e.g. test_20gb.csv) into a parquet dataset.
+    The schema of the first chunk is pinned for all chunks unless an explicit one is passed.
+    """
+    rows = 0
+    for chunk_num, chunk in enumerate(pd.read_csv(csv_path, chunksize=chunk_size)):
+        table = dataframe_to_table(chunk, schema=schema)
+        schema = table.schema
+        write_parquet(table, parquet_path, part_name=f"part-{chunk_num:05d}",
+                      partition_cols=partition_cols, row_group_size=row_group_size)
+        rows += len(chunk)
+    return rows
+
+
+def read_dataset(spark, path: str, input_format: str = "csv", schema=None, use_schema_cache: bool = True):
+    """
+    Reader used by the spark experiments.
+
+    - parquet: the schema comes from the file footers, no inference pass.
+    - csv with schema: explicit schema, no inference pass.
+    - csv without schema: schema from schema_registry, inferred once and reused until the file changes.
+    - csv with use_schema_cache=False: inferSchema=True (one extra full scan every read).
+    """
+    check_output_format(input_format)
+    if input_format == "parquet":
+        return spark.read.parquet(path)
+    if schema is None and use_schema_cache:
+        schema = schema_registry.get_or_infer(spark, path)
+    if schema is not None:
+        return spark.read.csv(path, header=True, schema=schema)
+    return spark.read.csv(path, header=True, inferSchema=True)
@@ -1,35 +1,31 @@
-from shlex import join
-from pyspark.sql import SparkSession
-
 import os
 import time
-import numpy as np
-import pandas as pd
-
-
-def time_it(func):
-    def wrapper(*args, **kwargs):
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        end_time = time.time()
-        print(f"Time taken: {end_time - start_time} seconds")
-        return result
-    return wrapper
-
-@time_it
-def experiment_csv():
-    spark = (
-        SparkSession.builder
-        .appName("spark experiment")
-        .master("local[16]")       # 4 threads
-        .config("spark.executor.memory", "512m")  # limit memory to 256 MB
-        .config("spark.sql.files.maxPartitionBytes", 1 * 1024*1024*512)  # 10 MB
-        .getOrCreate()
-    )
+
+from benchmark import run_benchmark
+from benchmark_registry import BENCHMARKS, register_benchmark
+from columnar_io import read_dataset, skewed_spark_schema
+from line_counter import count_lines
+from skew import skew_aware_join, skew_report
+from schema_cache import file_fingerprint
+from skewed_dataset import generate_skewed_dataset_parallel
+from spark_session import get_spark
+from stream_join import run_stream_join
+
+
+def dataset_path(csv_path: str, data_format: str) -> str:
+    """parquet copies live next to the csv: test_20gb.csv -> test_20gb_parquet/"""
+    if data_format == "parquet":
+        return os.path.splitext(csv_path)[0] + "_parquet"
+    return csv_path
+
+@register_benchmark()
+def experiment_csv(input_format: str = "csv"):
+    spark = get_spark("high-parallelism")
 
     csv_file_path = "/Users/himanshu.choudhary/work/clinical/mvp_1/cdi-python-ds/test_20gb.csv"
 
-    df = spark.read.csv(csv_file_path, header=True, inferSchema=True)
+    # parquet input skips inferSchema and the text parsing, see convert_csv_to_parquet
+    df = read_dataset(spark, dataset_path(csv_file_path, input_format), input_format=input_format)
 
     # print(df.count())
 
@@ -45,164 +41,127 @@ def experiment_csv():
     # print("Done experiment_csv")
 
     # print(df.show(10))
-    print(df.count())
+    row_cnt = df.count()
+    print(row_cnt)
+    return {"rows": row_cnt, "bytes_read": dataset_size(dataset_path(csv_file_path, input_format))}
 
-@time_it
+@register_benchmark()
 def experiment_csv_2():
-    spark = (
-        SparkSession.builder
-        .appName("spark experiment")
-        .master("local[16]")       # 4 threads
-        .config("spark.sql.files.maxPartitionBytes", 1 * 1024*1024*512)  # 10 MB
-        .getOrCreate()
-    )
     csv_file_path = "/Users/himanshu.choudhary/work/clinical/mvp_1/cdi-python-ds/test_20gb.csv"
-    line_cnt = 0
-    with open(csv_file_path, "r") as file:
-        for line in file:
-            line_cnt += 1
-            if line_cnt % 10000000 == 0:
-                print(f"Processed {line_cnt} lines")
+    # byte ranges are scanned in parallel processes, quoted=True skips newlines inside quoted fields
+    line_cnt = count_lines(csv_file_path, quoted=False, progress_every=10000000)
     print(f"Total lines: {line_cnt}")
 
     print("Done experiment_csv_2")
+    return {"rows": line_cnt, "bytes_read": dataset_size(csv_file_path)}
 
-@time_it
+@register_benchmark()
 def experiment_text():
-    # spark = (
-    #     SparkSession.builder
-    #     .appName("spark experiment")
-    #     .master("local[16]")       # 4 threads
-    #     .config("spark.sql.files.maxPartitionBytes", 1 * 1024*1024*10)  # 10 MB
-    #     .getOrCreate()
-    # )
+    spark = get_spark("small-mem")
     text_file_path = "/Users/himanshu.choudhary/work/clinical/mvp_1/cdi-python-ds/test_100mb.txt"
     df = spark.read.text(text_file_path)
     
     # print(df.show(10))
 
-    print(df.count())
+    row_cnt = df.count()
+    print(row_cnt)
 
     print("Done experiment_text")
+    return {"rows": row_cnt, "bytes_read": dataset_size(text_file_path)}
 
 
-def experiment_csv_3():
-    spark = (
-        SparkSession.builder
-        .appName("spark experiment")
-        .master("local[4]")       # 4 threads
-        .config("spark.executor.memory", "1g")
-        .config("spark.sql.files.maxPartitionBytes", 1 * 1024*1024*512)  # 10 MB
-        .getOrCreate()
-    )
+@register_benchmark()
+def experiment_csv_3(input_format: str = "csv"):
+    spark = get_spark("join-heavy")
     csv_file_path = "/Users/himanshu.choudhary/work/clinical/mvp1/pyspark/files/csv/test_20gb.csv"
-    df = spark.read.csv(csv_file_path, header=True, inferSchema=True)
+    df = read_dataset(spark, dataset_path(csv_file_path, input_format), input_format=input_format)
 
     ids_path = "/Users/himanshu.choudhary/work/clinical/mvp1/pyspark/files/csv/ids_of_20gb.csv"
-    id_df = spark.read.csv(ids_path, header=True, inferSchema=True)
+    id_df = read_dataset(spark, dataset_path(ids_path, input_format), input_format=input_format)
 
-    joined_df = df.join(id_df, df.id == id_df.id, "left")
+    # broadcasts id_df when it fits, otherwise salts the hot ids found in a sample,
+    # AQE skew join comes from the join-heavy profile
+    joined_df = skew_aware_join(df, id_df, key="id", how="left")
 
     # joined_df.write.csv("/Users/himanshu.choudhary/work/clinical/mvp1/pyspark/files/csv/joined_20gb.csv", header=True)
     print(joined_df.explain("formatted"))
 
-    joined_df.write.csv("/Users/himanshu.choudhary/work/clinical/mvp1/pyspark/files/csv/joined_20gb_v4", header=True)
+    output_dir = "/Users/himanshu.choudhary/work/clinical/mvp1/pyspark/files/csv/joined_20gb_v4"
+    joined_df.write.mode("overwrite").csv(output_dir, header=True)
+    return {"bytes_read": dataset_size(dataset_path(csv_file_path, input_format)),
+            "bytes_written": dataset_size(output_dir)}
 
-@time_it
-def experiment_python_3():
+@register_benchmark()
+def experiment_python_3(output_format: str = "csv", resume: bool = False):
     csv_file_path = "/Users/himanshu.choudhary/work/clinical/mvp1/pyspark/files/csv/test_20gb.csv"
     ids_path = "/Users/himanshu.choudhary/work/clinical/mvp1/pyspark/files/csv/ids_of_20gb.csv"
     output_dir = "/Users/himanshu.choudhary/work/clinical/mvp1/pyspark/files/csv/joined_20gb_python_v2"
 
-    os.makedirs(output_dir, exist_ok=True)
-
-    # Read the small IDs dataframe fully into memory
-    id_df = pd.read_csv(ids_path)
-
-    chunk_size = 500_000
-    chunk_num = 0
-    total_rows = 0
-
-    for chunk in pd.read_csv(csv_file_path, chunksize=chunk_size):
-        # Left join the chunk with the IDs dataframe on the 'id' column
-        joined_chunk = chunk.merge(id_df, on="id", how="left")
-
-        # Write each joined chunk to a separate part file
-        output_path = os.path.join(output_dir, f"part-{chunk_num:05d}.csv")
-        joined_chunk.to_csv(output_path, index=False, header=True)
-
-        total_rows += len(joined_chunk)
-        chunk_num += 1
-
-        if chunk_num % 10 == 0:
-            print(f"Processed {chunk_num} chunks, {total_rows:,} rows so far")
-
-    print(f"Done. Total chunks: {chunk_num}, Total rows: {total_rows:,}")
+    # index on id_df is built once, reading/joining/writing overlap through bounded queues
+    output_dir = dataset_path(output_dir, output_format)
+    stats = run_stream_join(csv_file_path=csv_file_path, ids_path=ids_path, output_dir=output_dir,
+                            on="id", output_format=output_format,
+                            # parts are committed to _manifest.json, after a crash experiment_python_3(resume=True)
+                            # continues after the last good chunk; the benchmark case recomputes everything
+                            checkpoint=True, resume=resume, chunk_bytes=64 * 1024 * 1024)
     print(f"Output written to: {output_dir}")
+    return {"rows": stats["rows"], "bytes_read": dataset_size(csv_file_path), "bytes_written": dataset_size(output_dir)}
 
 
-@time_it
-def generate_skewed_dataset():
+@register_benchmark()
+def generate_skewed_dataset(output_format: str = "csv", partition_cols=None):
     """
     Generates a ~5GB single skewed CSV file to study skewness & shuffling in PySpark.
     Department is heavily skewed (Engineering=70%), Region is moderately skewed (US-West=55%).
+    output_format="parquet" writes skewed_data_parquet/ instead, optionally partitioned by
+    partition_cols=["department", "region"].
     """
     output_path = "/Users/himanshu.choudhary/work/clinical/mvp1/pyspark/files/skewed_dataset/skewed_data.csv"
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    output_path = dataset_path(output_path, output_format)
 
     total_rows = 25_000_000  # ~5GB at ~200 bytes/row
     chunk_size = 500_000
 
-    departments = ["Engineering", "Sales", "HR", "Marketing", "Legal", "Finance"]
-    dept_weights = [0.70, 0.15, 0.05, 0.05, 0.03, 0.02]
+    print(f"Generating {total_rows:,} rows (~5GB) → {output_path}")
 
-    regions = ["US-West", "US-East", "Europe", "Asia", "Africa"]
-    region_weights = [0.55, 0.20, 0.12, 0.08, 0.05]
+    # every 500k chunk is generated and formatted by a worker process from its own seed substream
+    rows_written = generate_skewed_dataset_parallel(output_path=output_path, total_rows=total_rows,
+                                                    chunk_size=chunk_size, seed=42,
+                                                    output_format=output_format,
+                                                    partition_cols=partition_cols)
 
-    rng = np.random.default_rng(seed=42)
-    rows_written = 0
-    chunk_num = 0
-    write_header = True
+    print(f"Done. Total rows: {rows_written:,} → {output_path}")
+    return {"rows": rows_written, "bytes_written": dataset_size(output_path)}
 
-    print(f"Generating {total_rows:,} rows (~5GB) → {output_path}")
 
-    with open(output_path, "w") as f:
-        while rows_written < total_rows:
-            current_chunk = min(chunk_size, total_rows - rows_written)
-
-            dept_col = rng.choice(departments, size=current_chunk, p=dept_weights)
-            region_col = rng.choice(regions, size=current_chunk, p=region_weights)
-
-            chunk_df = pd.DataFrame({
-                "id":            np.arange(rows_written + 1, rows_written + current_chunk + 1),
-                "department":    dept_col,
-                "region":        region_col,
-                "employee_name": [f"emp_{i}" for i in range(rows_written + 1, rows_written + current_chunk + 1)],
-                "salary":        rng.integers(40_000, 250_000, size=current_chunk),
-                "bonus":         rng.integers(0, 50_000, size=current_chunk),
-                "years_exp":     rng.integers(0, 35, size=current_chunk),
-                "performance":   rng.uniform(1.0, 5.0, size=current_chunk).round(2),
-                "transactions":  rng.integers(1, 10_000, size=current_chunk),
-            })
-
-            chunk_df.to_csv(f, index=False, header=write_header)
-            write_header = False
-
-            rows_written += current_chunk
-            chunk_num += 1
-            if chunk_num % 5 == 0:
-                print(f"  {rows_written:>12,} / {total_rows:,} rows written")
+@register_benchmark()
+def experiment_skew(input_format: str = "csv"):
+    """Before/after partition sizes and stage times of groupBy/join on the skewed department column."""
+    spark = get_spark("join-heavy")
+    data_path = "/Users/himanshu.choudhary/work/clinical/mvp1/pyspark/files/skewed_dataset/skewed_data.csv"
+    df = read_dataset(spark, dataset_path(data_path, input_format), input_format=input_format,
+                      schema=skewed_spark_schema() if input_format == "csv" else None)
+    skew_report(spark, df, key="department", value_column="salary")
+    return {"bytes_read": dataset_size(dataset_path(data_path, input_format))}
 
-    print(f"Done. Total rows: {rows_written:,} → {output_path}")
+
+def dataset_size(path: str) -> int:
+    """bytes of a file or of all part files of a dataset directory"""
+    return file_fingerprint(path)[0]
 
 
 def experiement():
+    # every experiment is a registered benchmark case, run them with repeats/baselines via:
+    #   python benchmark.py experiment_csv experiment_python_3 --repeats 3 --baseline baseline.json
     # experiment_csv()
     # experiment_csv_2()
     # experiment_csv_3()
     # experiment_text()
     # experiment_python_3()
-    generate_skewed_dataset()
+    # experiment_skew()
+    summary = run_benchmark(BENCHMARKS["generate_skewed_dataset"], repeats=1, warmup=0)
+    print(f"Time taken: {summary['wall_seconds']} seconds")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,103 @@
+import json
+import os
+from typing import Optional, Tuple
+
+
+SCHEMA_SUFFIX = ".schema.json"
+
+
+def file_fingerprint(path: str) -> Tuple[int, float]:
+    """
+    (size, mtime) of a file, or of all files under a directory (spark part file datasets).
+    Any rewrite of the data changes at least one of them.
+    """
+    if not os.path.isdir(path):
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime
+
+    size = 0
+    mtime = os.stat(path).st_mtime
+    for root, _, files in os.walk(path):
+        for name in files:
+            if name.startswith((".", "_")):  # _SUCCESS, .crc files
+                continue
+            stat = os.stat(os.path.join(root, name))
+            size += stat.st_size
+            mtime = max(mtime, stat.st_mtime)
+    return size, mtime
+
+
+class SchemaRegistry:
+    """
+    Cache of inferred csv schemas, stored as a json sidecar next to the data:
+        test_20gb.csv -> test_20gb.csv.schema.json
+
+    The sidecar keeps the path, size and mtime the schema was inferred for. A cached schema is only
+    used when all three still match, otherwise the schema is inferred again and the sidecar rewritten.
+    cache_dir can be set when the data directory is not writable.
+    """
+    def __init__(self, cache_dir: Optional[str] = None, sampling_ratio: float = 1.0):
+        self.cache_dir = cache_dir
+        self.sampling_ratio = sampling_ratio
+
+    def _sidecar_path(self, path: str) -> str:
+        path = os.path.abspath(path).rstrip(os.sep)
+        if self.cache_dir is None:
+            return path + SCHEMA_SUFFIX
+        return os.path.join(self.cache_dir, path.strip(os.sep).replace(os.sep, "__") + SCHEMA_SUFFIX)
+
+    def _cache_key(self, path: str) -> dict:
+        size, mtime = file_fingerprint(path)
+        return {"path": os.path.abspath(path), "size": size, "mtime": mtime}
+
+    def load(self, path: str):
+        """Cached StructType for path, None when missing or stale."""
+        from pyspark.sql.types import StructType
+
+        sidecar_path = self._sidecar_path(path)
+        if not os.path.exists(sidecar_path):
+            return None
+        try:
+            with open(sidecar_path, "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get("key") != self._cache_key(path):
+            print(f"[SchemaRegistry] {path} changed since its schema was cached")
+            return None
+        return StructType.fromJson(entry["schema"])
+
+    def save(self, path: str, schema) -> None:
+        sidecar_path = self._sidecar_path(path)
+        os.makedirs(os.path.dirname(sidecar_path), exist_ok=True)
+        entry = {"key": self._cache_key(path), "schema": schema.jsonValue()}
+        tmp_path = sidecar_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, sidecar_path)  # readers never see a half written sidecar
+
+    def infer(self, spark, path: str):
+        """
+        Inference pass over the csv, sampling_ratio < 1.0 infers from a sample of the rows
+        instead of a full extra scan.
+        """
+        return spark.read.csv(path, header=True, inferSchema=True, samplingRatio=self.sampling_ratio).schema
+
+    def get_or_infer(self, spark, path: str):
+        schema = self.load(path)
+        if schema is not None:
+            return schema
+
+        print(f"[SchemaRegistry] Inferring schema for {path}")
+        schema = self.infer(spark, path)
+        self.save(path, schema)
+        return schema
+
+    def invalidate(self, path: str) -> None:
+        sidecar_path = self._sidecar_path(path)
+        if os.path.exists(sidecar_path):
+            os.remove(sidecar_path)
+
+
+schema_registry = SchemaRegistry()
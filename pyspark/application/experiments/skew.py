@@ -0,0 +1,275 @@
+import json
+import time
+import urllib.request
+from typing import Dict, List, Optional
+
+from pyspark.sql import DataFrame, SparkSession
+from pyspark.sql import functions as F
+
+
+SALT_COLUMN = "__salt"
+
+# decomposable aggregations: (partial agg on key+salt, final agg over the partial column)
+_TWO_PHASE_AGGS = {
+    "count": (lambda c: F.count(c), lambda c: F.sum(c)),
+    "sum":   (lambda c: F.sum(c),   lambda c: F.sum(c)),
+    "min":   (lambda c: F.min(c),   lambda c: F.min(c)),
+    "max":   (lambda c: F.max(c),   lambda c: F.max(c)),
+}
+
+
+def enable_aqe_skew_join(spark: SparkSession,
+                         skewed_partition_factor: int = 5,
+                         skewed_partition_threshold: str = "256MB",
+                         advisory_partition_size: str = "64MB") -> None:
+    """Let AQE split skewed shuffle partitions at runtime (spark >= 3.0)."""
+    spark.conf.set("spark.sql.adaptive.enabled", "true")
+    spark.conf.set("spark.sql.adaptive.skewJoin.enabled", "true")
+    spark.conf.set("spark.sql.adaptive.skewJoin.skewedPartitionFactor", str(skewed_partition_factor))
+    spark.conf.set("spark.sql.adaptive.skewJoin.skewedPartitionThresholdInBytes", skewed_partition_threshold)
+    spark.conf.set("spark.sql.adaptive.advisoryPartitionSizeInBytes", advisory_partition_size)
+    spark.conf.set("spark.sql.adaptive.coalescePartitions.enabled", "true")
+
+
+def find_hot_keys(df: DataFrame,
+                  key: str,
+                  sample_fraction: float = 0.01,
+                  min_share: float = 0.05,
+                  seed: int = 42) -> Dict[object, float]:
+    """
+    Keys holding at least min_share of the rows, estimated from a sample: {key_value: share}.
+    On the skewed dataset this returns {"Engineering": ~0.70, "Sales": ~0.15, ...}.
+    """
+    sample = df.select(key).sample(fraction=sample_fraction, seed=seed).where(F.col(key).isNotNull())
+    counts = sample.groupBy(key).count().collect()
+    total = sum(row["count"] for row in counts)
+    if total == 0:
+        return {}
+    return {
+        row[key]: row["count"] / total
+        for row in counts
+        if row["count"] / total >= min_share
+    }
+
+
+def salt_buckets_for(hot_keys: Dict[object, float], max_buckets: int = 64, target_share: float = 0.01) -> int:
+    """Enough buckets for the hottest key to drop to ~target_share of the rows per bucket."""
+    if not hot_keys:
+        return 1
+    return max(2, min(max_buckets, int(max(hot_keys.values()) / target_share)))
+
+
+def _salt_large_side(df: DataFrame, key: str, hot_keys: List[object], salt_buckets: int) -> DataFrame:
+    """Hot key rows get a random salt in [0, salt_buckets), every other row salt 0."""
+    random_salt = (F.rand() * salt_buckets).cast("int")
+    return df.withColumn(
+        SALT_COLUMN,
+        F.when(F.col(key).isin(hot_keys), random_salt).otherwise(F.lit(0)),
+    )
+
+
+def _replicate_small_side(df: DataFrame, key: str, hot_keys: List[object], salt_buckets: int) -> DataFrame:
+    """Hot key rows are copied once per salt value, every other row keeps salt 0."""
+    all_salts = F.array(*[F.lit(i) for i in range(salt_buckets)])
+    return df.withColumn(
+        SALT_COLUMN,
+        F.explode(F.when(F.col(key).isin(hot_keys), all_salts).otherwise(F.array(F.lit(0)))),
+    )
+
+
+def estimated_size_in_bytes(df: DataFrame) -> Optional[int]:
+    """Optimizer size estimate of df, None when the plan has no statistics."""
+    try:
+        return int(df._jdf.queryExecution().optimizedPlan().stats().sizeInBytes().toString())
+    except Exception:
+        return None
+
+
+def salted_join(large: DataFrame, small: DataFrame, key: str, hot_keys: List[object],
+                salt_buckets: int, how: str = "inner") -> DataFrame:
+    """
+    Join on (key, salt): rows of a hot key are spread over salt_buckets shuffle partitions instead of one.
+    Supports inner and left joins (the large side must be the preserved side).
+    """
+    if how not in ("inner", "left"):
+        raise ValueError(f"salted join supports inner and left joins, got: {how}")
+    salted_large = _salt_large_side(large, key, hot_keys, salt_buckets)
+    salted_small = _replicate_small_side(small, key, hot_keys, salt_buckets)
+    return salted_large.join(salted_small, on=[key, SALT_COLUMN], how=how).drop(SALT_COLUMN)
+
+
+def skew_aware_join(large: DataFrame,
+                    small: DataFrame,
+                    key: str,
+                    how: str = "inner",
+                    broadcast_threshold_bytes: int = 64 * 1024 * 1024,
+                    sample_fraction: float = 0.01,
+                    min_share: float = 0.05) -> DataFrame:
+    """
+    1. small side fits broadcast_threshold_bytes -> broadcast hash join, no shuffle so no skew.
+    2. hot keys found in a sample of the large side -> salted join.
+    3. otherwise a plain join, AQE skew join (enable_aqe_skew_join) still splits skewed partitions.
+    """
+    small_size = estimated_size_in_bytes(small)
+    if small_size is not None and small_size <= broadcast_threshold_bytes:
+        print(f"[skew] broadcasting small side (~{small_size:,} bytes)")
+        return large.join(F.broadcast(small), on=key, how=how)
+
+    hot_keys = find_hot_keys(large, key, sample_fraction=sample_fraction, min_share=min_share)
+    if hot_keys and how in ("inner", "left"):
+        salt_buckets = salt_buckets_for(hot_keys)
+        print(f"[skew] salting {len(hot_keys)} hot keys of {key} into {salt_buckets} buckets: {hot_keys}")
+        return salted_join(large, small, key, list(hot_keys), salt_buckets, how=how)
+
+    return large.join(small, on=key, how=how)
+
+
+def salted_group_by(df: DataFrame,
+                    key: str,
+                    aggs: Dict[str, str],
+                    hot_keys: Optional[List[object]] = None,
+                    salt_buckets: int = 32) -> DataFrame:
+    """
+    Two phase groupBy(key).agg(aggs) for count/sum/min/max: partial aggregation on (key, salt)
+    spreads the hot keys over salt_buckets tasks, the final aggregation then only sees
+    salt_buckets rows per key. aggs maps column -> aggregation name, e.g. {"salary": "sum"}.
+    """
+    for agg_name in aggs.values():
+        if agg_name not in _TWO_PHASE_AGGS:
+            raise ValueError(f"salted_group_by supports {list(_TWO_PHASE_AGGS)}, got: {agg_name}")
+
+    if hot_keys is None:
+        hot_keys = list(find_hot_keys(df, key))
+    salted = _salt_large_side(df, key, hot_keys, salt_buckets)
+
+    partial = salted.groupBy(key, SALT_COLUMN).agg(*[
+        _TWO_PHASE_AGGS[agg_name][0](column).alias(f"{agg_name}_{column}")
+        for column, agg_name in aggs.items()
+    ])
+    return partial.groupBy(key).agg(*[
+        _TWO_PHASE_AGGS[agg_name][1](f"{agg_name}_{column}").alias(f"{agg_name}_{column}")
+        for column, agg_name in aggs.items()
+    ])
+
+
+def partition_sizes(df: DataFrame) -> List[int]:
+    """Rows per partition of df (runs a job)."""
+    rows = df.groupBy(F.spark_partition_id().alias("pid")).count().collect()
+    return sorted(row["count"] for row in rows)
+
+
+def _get_json(url: str):
+    with urllib.request.urlopen(url, timeout=10) as response:
+        return json.loads(response.read().decode())
+
+
+def stage_times(spark: SparkSession, job_group: str) -> List[dict]:
+    """
+    Per stage timings of the jobs in job_group, from the spark UI REST api:
+    task count, total executor run time and median/max task time (max >> median means a skewed stage).
+    """
+    ui_url = spark.sparkContext.uiWebUrl
+    if not ui_url:
+        return []
+    api = f"{ui_url}/api/v1/applications/{spark.sparkContext.applicationId}"
+    try:
+        stage_ids = sorted({
+            stage_id
+            for job in _get_json(f"{api}/jobs")
+            if job.get("jobGroup") == job_group
+            for stage_id in job["stageIds"]
+        })
+        result = []
+        for stage_id in stage_ids:
+            for attempt in _get_json(f"{api}/stages/{stage_id}"):
+                if attempt.get("status") != "COMPLETE":
+                    continue
+                summary = _get_json(f"{api}/stages/{stage_id}/{attempt['attemptId']}/taskSummary?quantiles=0.5,1.0")
+                result.append({
+                    "stage_id": stage_id,
+                    "tasks": attempt["numTasks"],
+                    "executor_run_time_ms": attempt["executorRunTime"],
+                    "median_task_ms": summary["executorRunTime"][0],
+                    "max_task_ms": summary["executorRunTime"][1],
+                })
+        return result
+    except Exception as e:  # the report is best effort, the UI may be disabled
+        print(f"[skew] could not read stage times: {e}")
+        return []
+
+
+def _run_tagged(spark: SparkSession, job_group: str, df: DataFrame,
+                shuffle_input: Optional[DataFrame] = None) -> dict:
+    """
+    Times the job computing df. The partition sizes are those of df (a join keeps the partitioning
+    of its shuffle), or of shuffle_input when df is an aggregate: its output is one row per key and
+    says nothing about how the rows were spread before aggregating. shuffle_input is then measured
+    in a separate, untimed job outside job_group.
+    """
+    spark.sparkContext.setJobGroup(job_group, job_group)
+    start_time = time.time()
+    if shuffle_input is None:
+        sizes = partition_sizes(df)
+    else:
+        df.write.format("noop").mode("overwrite").save()
+    elapsed = time.time() - start_time
+    spark.sparkContext.setLocalProperty("spark.jobGroup.id", None)
+    if shuffle_input is not None:
+        sizes = partition_sizes(shuffle_input)
+    return {
+        "variant": job_group,
+        "seconds": round(elapsed, 2),
+        "partitions": len(sizes),
+        "min_rows": sizes[0] if sizes else 0,
+        "median_rows": sizes[len(sizes) // 2] if sizes else 0,
+        "max_rows": sizes[-1] if sizes else 0,
+        "stages": stage_times(spark, job_group),
+    }
+
+
+def skew_report(spark: SparkSession, df: DataFrame, key: str = "department",
+                value_column: str = "salary") -> List[dict]:
+    """
+    Before/after report on the skewed dataset: partition sizes and stage times of
+    - a plain groupBy vs salted_group_by, sizes of their shuffle input: df hash partitioned on key,
+      resp. on (key, salt) like the partial aggregation
+    - a plain shuffle join vs skew_aware_join against a small per key dimension table.
+    Broadcast joins are disabled for the "before" join so it really shuffles on the skewed key.
+    """
+    dim = df.select(key).distinct().withColumn("key_label", F.upper(F.col(key)))
+    hot_key_shares = find_hot_keys(df, key)
+    hot_keys = list(hot_key_shares)
+    salt_buckets = salt_buckets_for(hot_key_shares)
+
+    original_conf = {
+        name: spark.conf.get(name, None)
+        for name in ("spark.sql.adaptive.enabled", "spark.sql.autoBroadcastJoinThreshold")
+    }
+    report = []
+    try:
+        spark.conf.set("spark.sql.adaptive.enabled", "false")
+        spark.conf.set("spark.sql.autoBroadcastJoinThreshold", "-1")
+        report.append(_run_tagged(spark, "groupby_before", df.groupBy(key).agg(F.sum(value_column)),
+                                  shuffle_input=df.repartition(key)))
+        report.append(_run_tagged(spark, "join_before", df.join(dim, on=key, how="left")))
+
+        enable_aqe_skew_join(spark)
+        report.append(_run_tagged(spark, "groupby_after", salted_group_by(
+            df, key, {value_column: "sum"}, hot_keys=hot_keys, salt_buckets=salt_buckets),
+            shuffle_input=_salt_large_side(df, key, hot_keys, salt_buckets).repartition(key, SALT_COLUMN)))
+        report.append(_run_tagged(spark, "join_after", salted_join(
+            df, dim, key, hot_keys, salt_buckets, how="left")))
+    finally:
+        for name, value in original_conf.items():
+            if value is None:
+                spark.conf.unset(name)
+            else:
+                spark.conf.set(name, value)
+
+    for entry in report:
+        print(f"{entry['variant']:<16} {entry['seconds']:>8}s  partitions: {entry['partitions']:>4}  "
+              f"rows/partition min/median/max: {entry['min_rows']:,}/{entry['median_rows']:,}/{entry['max_rows']:,}")
+        for stage in entry["stages"]:
+            print(f"    stage {stage['stage_id']:>4}: {stage['tasks']:>4} tasks, "
+                  f"median task {stage['median_task_ms']:.0f} ms, max task {stage['max_task_ms']:.0f} ms")
+    return report
@@ -0,0 +1,167 @@
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from columnar_io import DEFAULT_ROW_GROUP_SIZE, check_output_format, pa, skewed_arrow_schema, write_parquet
+
+
+DEPARTMENTS = ["Engineering", "Sales", "HR", "Marketing", "Legal", "Finance"]
+DEPT_WEIGHTS = [0.70, 0.15, 0.05, 0.05, 0.03, 0.02]
+
+REGIONS = ["US-West", "US-East", "Europe", "Asia", "Africa"]
+REGION_WEIGHTS = [0.55, 0.20, 0.12, 0.08, 0.05]
+
+COLUMNS = ["id", "department", "region", "employee_name", "salary",
+           "bonus", "years_exp", "performance", "transactions"]
+
+
+def chunk_seeds(seed: int, total_rows: int, chunk_size: int) -> List[np.random.SeedSequence]:
+    """
+    One independent SeedSequence per chunk of rows.
+
+    Chunk i always gets the i-th child of `seed`, so the generated rows only depend on
+    (seed, total_rows, chunk_size) and never on the number of workers or the order they finish in.
+    """
+    n_chunks = (total_rows + chunk_size - 1) // chunk_size
+    return np.random.SeedSequence(seed).spawn(n_chunks)
+
+
+def generate_chunk_columns(seed_seq: np.random.SeedSequence, first_id: int, n_rows: int) -> Dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed_seq)
+    ids = np.arange(first_id, first_id + n_rows)
+    return {
+        "id":           ids,
+        "department":   rng.choice(len(DEPARTMENTS), size=n_rows, p=DEPT_WEIGHTS),
+        "region":       rng.choice(len(REGIONS), size=n_rows, p=REGION_WEIGHTS),
+        "salary":       rng.integers(40_000, 250_000, size=n_rows),
+        "bonus":        rng.integers(0, 50_000, size=n_rows),
+        "years_exp":    rng.integers(0, 35, size=n_rows),
+        "performance":  rng.uniform(1.0, 5.0, size=n_rows).round(2),
+        "transactions": rng.integers(1, 10_000, size=n_rows),
+    }
+
+
+def format_csv_bytes(columns: Dict[str, np.ndarray]) -> bytes:
+    """
+    Render a chunk as csv bytes without building a DataFrame.
+
+    Numbers are converted with map(str, ndarray.tolist()) and department/region are looked up
+    from their index arrays, rows are stitched together by a single str.join over zip.
+    """
+    ids = list(map(str, columns["id"].tolist()))
+    fields = [
+        ids,
+        [DEPARTMENTS[i] for i in columns["department"].tolist()],
+        [REGIONS[i] for i in columns["region"].tolist()],
+        ["emp_" + i for i in ids],
+        list(map(str, columns["salary"].tolist())),
+        list(map(str, columns["bonus"].tolist())),
+        list(map(str, columns["years_exp"].tolist())),
+        list(map(str, columns["performance"].tolist())),
+        list(map(str, columns["transactions"].tolist())),
+    ]
+    return ("\n".join(map(",".join, zip(*fields))) + "\n").encode()
+
+
+def _part_path(parts_dir: str, chunk_num: int) -> str:
+    return os.path.join(parts_dir, f"part-{chunk_num:05d}.csv")
+
+
+def _write_csv_part(parts_dir: str, chunk_num: int, seed_seq: np.random.SeedSequence,
+                    first_id: int, n_rows: int, header: bool) -> int:
+    columns = generate_chunk_columns(seed_seq=seed_seq, first_id=first_id, n_rows=n_rows)
+    with open(_part_path(parts_dir, chunk_num), "wb") as f:
+        if header:
+            f.write((",".join(COLUMNS) + "\n").encode())
+        f.write(format_csv_bytes(columns))
+    return n_rows
+
+
+def _write_parquet_part(output_dir: str, chunk_num: int, seed_seq: np.random.SeedSequence,
+                        first_id: int, n_rows: int, partition_cols: Optional[List[str]],
+                        row_group_size: int) -> int:
+    columns = generate_chunk_columns(seed_seq=seed_seq, first_id=first_id, n_rows=n_rows)
+    table = pa.table({
+        "id":            columns["id"],
+        "department":    np.array(DEPARTMENTS, dtype=object)[columns["department"]],
+        "region":        np.array(REGIONS, dtype=object)[columns["region"]],
+        "employee_name": np.char.add("emp_", columns["id"].astype(str)),
+        "salary":        columns["salary"],
+        "bonus":         columns["bonus"],
+        "years_exp":     columns["years_exp"],
+        "performance":   columns["performance"],
+        "transactions":  columns["transactions"],
+    }, schema=skewed_arrow_schema())
+    write_parquet(table, output_dir, part_name=f"part-{chunk_num:05d}",
+                  partition_cols=partition_cols, row_group_size=row_group_size)
+    return n_rows
+
+
+def _concat_parts(part_paths: List[str], output_path: str) -> None:
+    with open(output_path, "wb") as out:
+        out.write((",".join(COLUMNS) + "\n").encode())
+        for part_path in part_paths:
+            with open(part_path, "rb") as part:
+                shutil.copyfileobj(part, out, length=16 * 1024 * 1024)
+            os.remove(part_path)
+
+
+def generate_skewed_dataset_parallel(output_path: str,
+                                     total_rows: int = 25_000_000,
+                                     chunk_size: int = 500_000,
+                                     seed: int = 42,
+                                     workers: Optional[int] = None,
+                                     single_file: bool = True,
+                                     output_format: str = "csv",
+                                     partition_cols: Optional[List[str]] = None,
+                                     row_group_size: int = DEFAULT_ROW_GROUP_SIZE) -> int:
+    """
+    Generate the skewed dataset with a process pool, one chunk of rows per task.
+
+    - Every chunk has its own deterministic rng substream (see chunk_seeds), output is identical for a
+      given seed whatever the number of workers.
+    - single_file=True: parts are written without header next to output_path and concatenated in
+      order into output_path.
+    - single_file=False: output_path is a directory of ordered part files, each with a header, which
+      is what spark.read.csv(dir, header=True) expects.
+    - output_format="parquet": output_path is a parquet dataset directory written with the explicit
+      skewed_arrow_schema, optionally hive partitioned by partition_cols (e.g. ["department", "region"]),
+      single_file is ignored.
+    """
+    check_output_format(output_format)
+    if output_format == "parquet":
+        single_file = False
+    elif partition_cols:
+        raise ValueError("partition_cols is only supported for parquet output")
+
+    if single_file:
+        parts_dir = output_path + ".parts"
+    else:
+        parts_dir = output_path
+    os.makedirs(parts_dir, exist_ok=True)
+
+    seeds = chunk_seeds(seed=seed, total_rows=total_rows, chunk_size=chunk_size)
+    rows_written = 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = []
+        for chunk_num, seed_seq in enumerate(seeds):
+            first_id = chunk_num * chunk_size + 1
+            n_rows = min(chunk_size, total_rows - chunk_num * chunk_size)
+            if output_format == "parquet":
+                futures.append(executor.submit(_write_parquet_part, parts_dir, chunk_num, seed_seq, first_id,
+                                               n_rows, partition_cols, row_group_size))
+            else:
+                futures.append(executor.submit(_write_csv_part, parts_dir, chunk_num, seed_seq, first_id,
+                                               n_rows, not single_file))
+        for chunk_num, future in enumerate(futures, start=1):
+            rows_written += future.result()
+            if chunk_num % 5 == 0:
+                print(f"  {rows_written:>12,} / {total_rows:,} rows written")
+
+    if single_file:
+        _concat_parts([_part_path(parts_dir, i) for i in range(len(seeds))], output_path)
+        os.rmdir(parts_dir)
+    return rows_written
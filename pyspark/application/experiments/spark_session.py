@@ -0,0 +1,113 @@
+import os
+from typing import Dict, Optional, Set
+
+from pyspark.sql import SparkSession
+
+
+KRYO_SERIALIZER = "org.apache.spark.serializer.KryoSerializer"
+
+# static confs are read once when the JVM starts, changing them needs a new session
+STATIC_CONFS = (
+    "spark.master",
+    "spark.driver.memory",
+    "spark.executor.memory",
+    "spark.serializer",
+    "spark.kryoserializer.buffer.max",
+)
+
+# in local mode the executors live inside the driver JVM, so driver memory is the one that counts
+PROFILES: Dict[str, Dict[str, str]] = {
+    "small-mem": {
+        "spark.master": "local[4]",
+        "spark.driver.memory": "1g",
+        "spark.serializer": KRYO_SERIALIZER,
+        "spark.sql.shuffle.partitions": "8",
+        "spark.sql.adaptive.enabled": "true",
+        "spark.sql.adaptive.coalescePartitions.enabled": "true",
+        "spark.sql.autoBroadcastJoinThreshold": str(10 * 1024 * 1024),  # 10 MB
+        "spark.sql.files.maxPartitionBytes": str(64 * 1024 * 1024),      # 64 MB
+    },
+    "high-parallelism": {
+        "spark.master": "local[*]",
+        "spark.driver.memory": "4g",
+        "spark.serializer": KRYO_SERIALIZER,
+        "spark.sql.shuffle.partitions": str(4 * (os.cpu_count() or 4)),
+        "spark.sql.adaptive.enabled": "true",
+        "spark.sql.adaptive.coalescePartitions.enabled": "true",
+        "spark.sql.autoBroadcastJoinThreshold": str(10 * 1024 * 1024),  # 10 MB
+        "spark.sql.files.maxPartitionBytes": str(128 * 1024 * 1024),     # 128 MB
+    },
+    "join-heavy": {
+        "spark.master": "local[*]",
+        "spark.driver.memory": "6g",
+        "spark.serializer": KRYO_SERIALIZER,
+        "spark.kryoserializer.buffer.max": "512m",
+        "spark.sql.shuffle.partitions": "200",
+        "spark.sql.adaptive.enabled": "true",
+        "spark.sql.adaptive.coalescePartitions.enabled": "true",
+        "spark.sql.adaptive.skewJoin.enabled": "true",
+        "spark.sql.autoBroadcastJoinThreshold": str(64 * 1024 * 1024),  # 64 MB
+        "spark.sql.files.maxPartitionBytes": str(128 * 1024 * 1024),     # 128 MB
+    },
+}
+
+
+class SparkSessionProvider:
+    """
+    One live SparkSession per process, configured from a named profile.
+
+    The first get() starts the JVM with every conf of the profile. Later get() calls with another
+    profile reuse the same session and only switch the runtime (spark.sql.*) confs, so timed
+    experiments never pay JVM startup and all run on the same static setup. Static conf differences
+    are reported, call stop() first to really change them.
+    """
+    def __init__(self, app_name: str = "spark experiment"):
+        self.app_name = app_name
+        self._spark: Optional[SparkSession] = None
+        self._static_confs: Dict[str, str] = {}
+        self._runtime_confs: Set[str] = set()
+
+    def get(self, profile: str = "small-mem", overrides: Optional[Dict[str, str]] = None) -> SparkSession:
+        if profile not in PROFILES:
+            raise ValueError(f"unknown spark profile: {profile}, expected one of {list(PROFILES)}")
+        confs = {**PROFILES[profile], **{key: str(value) for key, value in (overrides or {}).items()}}
+
+        if self._spark is None:
+            self._spark = self._build(confs)
+            self._static_confs = {key: value for key, value in confs.items() if key in STATIC_CONFS}
+            self._runtime_confs = {key for key in confs if key not in STATIC_CONFS}
+            return self._spark
+
+        # runtime confs of the previous profile that this one doesn't set go back to spark defaults
+        for key in self._runtime_confs - confs.keys():
+            self._spark.conf.unset(key)
+        self._runtime_confs = {key for key in confs if key not in STATIC_CONFS}
+
+        for key, value in confs.items():
+            if key in STATIC_CONFS:
+                if self._static_confs.get(key) != value:
+                    print(f"[SparkSessionProvider] {key}={value} of profile {profile} ignored, "
+                          f"session was started with {self._static_confs.get(key)}")
+                continue
+            self._spark.conf.set(key, value)
+        return self._spark
+
+    def _build(self, confs: Dict[str, str]) -> SparkSession:
+        builder = SparkSession.builder.appName(self.app_name)
+        for key, value in confs.items():
+            builder = builder.config(key, value)
+        return builder.getOrCreate()
+
+    def stop(self) -> None:
+        if self._spark is not None:
+            self._spark.stop()
+            self._spark = None
+            self._static_confs = {}
+            self._runtime_confs = set()
+
+
+session_provider = SparkSessionProvider()
+
+
+def get_spark(profile: str = "small-mem", overrides: Optional[Dict[str, str]] = None) -> SparkSession:
+    return session_provider.get(profile, overrides=overrides)
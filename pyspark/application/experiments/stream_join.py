@@ -0,0 +1,279 @@
+import os
+import queue
+import resource
+import sys
+import threading
+import time
+from io import BytesIO
+from typing import Callable, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+from checkpoint import CheckpointManifest
+from columnar_io import DEFAULT_ROW_GROUP_SIZE, check_output_format, dataframe_to_table, write_parquet
+
+
+_DONE = object()
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (ru_maxrss is bytes on macOS, KB on linux)."""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return max_rss / (1024 * 1024)
+    return max_rss / 1024
+
+
+class LookupIndex:
+    """
+    Hash index on the small side of a left join, built once and probed by every chunk.
+
+    The index is a pd.Index over the key column, probing is a single vectorized get_indexer call
+    and the right side columns are gathered with a NumPy take, no per chunk hash table rebuild.
+    """
+    def __init__(self, right_df: pd.DataFrame, on: str, suffixes=("_x", "_y")):
+        self.on = on
+        self.suffixes = suffixes
+        self.index = pd.Index(right_df[on].to_numpy())
+        self.is_unique = self.index.is_unique
+        self.right_df = right_df
+        self.right_columns = {
+            column: right_df[column].to_numpy()
+            for column in right_df.columns if column != on
+        }
+
+    def _right_name(self, column: str, left_columns) -> str:
+        return f"{column}{self.suffixes[1]}" if column in left_columns else column
+
+    def _left_name(self, column: str) -> str:
+        return f"{column}{self.suffixes[0]}" if column in self.right_columns else column
+
+    def probe(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Left join chunk with the indexed side, same rows/columns as chunk.merge(right, on, how="left")."""
+        if not self.is_unique:
+            # duplicated keys fan out rows, get_indexer can't express that
+            return chunk.merge(self.right_df, on=self.on, how="left", suffixes=self.suffixes)
+
+        positions = self.index.get_indexer(chunk[self.on].to_numpy())
+        joined = chunk.rename(columns={column: self._left_name(column) for column in chunk.columns if column != self.on})
+        for column, values in self.right_columns.items():
+            joined[self._right_name(column, chunk.columns)] = pd.api.extensions.take(
+                values, positions, allow_fill=True
+            )
+        return joined
+
+
+def _produce(chunks: Iterable[pd.DataFrame], out_queue: queue.Queue, errors: list) -> None:
+    try:
+        for chunk in chunks:
+            out_queue.put(chunk)
+    except BaseException as e:
+        errors.append(e)
+    finally:
+        out_queue.put(_DONE)
+
+
+def _consume(in_queue: queue.Queue, write_part: Callable[[pd.DataFrame, int], Optional[List[str]]],
+             on_part_written: Optional[Callable[[int, int, Optional[List[str]]], None]], errors: list) -> None:
+    try:
+        while True:
+            item = in_queue.get()
+            if item is _DONE:
+                return
+            chunk_num, joined_chunk = item
+            files = write_part(joined_chunk, chunk_num)
+            if on_part_written is not None:
+                on_part_written(chunk_num, len(joined_chunk), files)
+    except BaseException as e:
+        errors.append(e)
+        # keep draining so the join loop never blocks on a full queue
+        while in_queue.get() is not _DONE:
+            pass
+
+
+def write_csv_part(output_dir: str) -> Callable[[pd.DataFrame, int], List[str]]:
+    def write_part(joined_chunk: pd.DataFrame, chunk_num: int) -> List[str]:
+        output_path = os.path.join(output_dir, f"part-{chunk_num:05d}.csv")
+        # tmp file + rename, a crash never leaves a half written part-*.csv behind
+        joined_chunk.to_csv(output_path + ".tmp", index=False, header=True)
+        os.replace(output_path + ".tmp", output_path)
+        return [output_path]
+    return write_part
+
+
+def write_parquet_part(output_dir: str,
+                       partition_cols: Optional[List[str]] = None,
+                       row_group_size: int = DEFAULT_ROW_GROUP_SIZE) -> Callable[[pd.DataFrame, int], List[str]]:
+    """Parquet part writer, the arrow schema of the first part is pinned so all parts stay identical."""
+    schema = None
+
+    def write_part(joined_chunk: pd.DataFrame, chunk_num: int) -> List[str]:
+        nonlocal schema
+        table = dataframe_to_table(joined_chunk, schema=schema)
+        schema = table.schema
+        return write_parquet(table, output_dir, part_name=f"part-{chunk_num:05d}",
+                      partition_cols=partition_cols, row_group_size=row_group_size)
+    return write_part
+
+
+def stream_left_join(chunks: Iterable[pd.DataFrame],
+                     lookup: LookupIndex,
+                     write_part: Callable[[pd.DataFrame, int], Optional[List[str]]],
+                     queue_size: int = 4,
+                     log_every: int = 10,
+                     start_chunk_num: int = 0,
+                     on_part_written: Optional[Callable[[int, int, Optional[List[str]]], None]] = None) -> dict:
+    """
+    Reader thread -> join (caller thread) -> writer thread, connected with bounded queues.
+
+    At most `queue_size` chunks wait on each side, so memory stays bounded while reading, joining and
+    writing overlap (pandas csv parsing and file writes release the GIL for most of their time).
+    on_part_written(chunk_num, rows, files) runs on the writer thread once a part is fully written.
+    Returns run stats: chunks, rows, seconds, rows_per_sec, peak_rss_mb.
+    """
+    read_queue = queue.Queue(maxsize=queue_size)
+    write_queue = queue.Queue(maxsize=queue_size)
+    errors = []
+
+    reader = threading.Thread(target=_produce, args=(chunks, read_queue, errors), daemon=True)
+    writer = threading.Thread(target=_consume, args=(write_queue, write_part, on_part_written, errors), daemon=True)
+
+    start_time = time.time()
+    reader.start()
+    writer.start()
+
+    chunk_num = start_chunk_num
+    total_rows = 0
+    try:
+        while True:
+            chunk = read_queue.get()
+            if chunk is _DONE or errors:
+                break
+            joined_chunk = lookup.probe(chunk)
+            write_queue.put((chunk_num, joined_chunk))
+
+            total_rows += len(joined_chunk)
+            chunk_num += 1
+            if log_every and chunk_num % log_every == 0:
+                elapsed = time.time() - start_time
+                print(f"Processed {chunk_num} chunks, {total_rows:,} rows so far, "
+                      f"{total_rows / elapsed:,.0f} rows/s, peak rss: {peak_rss_mb():,.0f} MB")
+    finally:
+        write_queue.put(_DONE)
+        writer.join()
+
+    if errors:
+        raise errors[0]
+
+    elapsed = time.time() - start_time
+    return {
+        "chunks": chunk_num - start_chunk_num,
+        "rows": total_rows,
+        "seconds": elapsed,
+        "rows_per_sec": total_rows / elapsed if elapsed else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def read_csv_chunks(path: str, chunk_size: int, **read_csv_kwargs) -> Iterable[pd.DataFrame]:
+    return pd.read_csv(path, chunksize=chunk_size, **read_csv_kwargs)
+
+
+class CsvByteChunkReader:
+    """
+    Reads a csv in chunks of ~chunk_bytes cut at line ends, so every chunk has a known byte range
+    (kept in `ranges`, in read order) and a job can restart from a byte offset instead of row 0.
+    Rows with quoted newlines are not supported, use read_csv_chunks for those files.
+    """
+    def __init__(self, path: str, chunk_bytes: int = 64 * 1024 * 1024, start_offset: Optional[int] = None,
+                 **read_csv_kwargs):
+        self.path = path
+        self.chunk_bytes = chunk_bytes
+        self.read_csv_kwargs = read_csv_kwargs
+        with open(path, "rb") as file:
+            self.header = file.readline()
+        self.start_offset = len(self.header) if start_offset is None else start_offset
+        self.ranges = []
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        with open(self.path, "rb") as file:
+            file.seek(self.start_offset)
+            start = self.start_offset
+            while True:
+                block = file.read(self.chunk_bytes)
+                if not block:
+                    return
+                block += file.readline()  # finish the last row of the block
+                end = start + len(block)
+                self.ranges.append((start, end))
+                yield pd.read_csv(BytesIO(self.header + block), **self.read_csv_kwargs)
+                start = end
+
+
+def run_stream_join(csv_file_path: str,
+                    ids_path: str,
+                    output_dir: str,
+                    on: str = "id",
+                    chunk_size: int = 500_000,
+                    queue_size: int = 4,
+                    output_format: str = "csv",
+                    partition_cols: Optional[List[str]] = None,
+                    write_part: Optional[Callable[[pd.DataFrame, int], Optional[List[str]]]] = None,
+                    checkpoint: bool = False,
+                    resume: bool = True,
+                    chunk_bytes: int = 64 * 1024 * 1024) -> dict:
+    """
+    checkpoint=True reads the csv in byte ranges (CsvByteChunkReader) and commits every written part
+    with its byte range into output_dir/_manifest.json. A later run with resume=True verifies the
+    committed parts, drops partial outputs and continues after the last intact chunk.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    lookup = LookupIndex(pd.read_csv(ids_path), on=on)
+    if write_part is None:
+        check_output_format(output_format)
+        if output_format == "parquet":
+            write_part = write_parquet_part(output_dir, partition_cols=partition_cols)
+        else:
+            write_part = write_csv_part(output_dir)
+
+    if not checkpoint:
+        stats = stream_left_join(
+            chunks=read_csv_chunks(csv_file_path, chunk_size=chunk_size),
+            lookup=lookup,
+            write_part=write_part,
+            queue_size=queue_size,
+        )
+    else:
+        stats = _run_checkpointed(csv_file_path, ids_path, output_dir, lookup, write_part, queue_size,
+                                  chunk_bytes=chunk_bytes, resume=resume, output_format=output_format)
+    print(f"Done. Total chunks: {stats['chunks']}, Total rows: {stats['rows']:,}, "
+          f"{stats['rows_per_sec']:,.0f} rows/s, peak rss: {stats['peak_rss_mb']:,.0f} MB")
+    return stats
+
+
+def _run_checkpointed(csv_file_path: str, ids_path: str, output_dir: str, lookup: LookupIndex,
+                      write_part: Callable[[pd.DataFrame, int], Optional[List[str]]], queue_size: int,
+                      chunk_bytes: int, resume: bool, output_format: str) -> dict:
+    csv_stat = os.stat(csv_file_path)
+    ids_stat = os.stat(ids_path)
+    manifest = CheckpointManifest(output_dir, job={
+        "csv_path": os.path.abspath(csv_file_path), "csv_size": csv_stat.st_size, "csv_mtime": csv_stat.st_mtime,
+        "ids_path": os.path.abspath(ids_path), "ids_size": ids_stat.st_size, "ids_mtime": ids_stat.st_mtime,
+        "on": lookup.on, "chunk_bytes": chunk_bytes, "output_format": output_format,
+    })
+    start_chunk_num, start_offset = manifest.resume_point() if resume else (0, None)
+    manifest.discard_uncommitted(keep=set(range(start_chunk_num)))
+    if start_chunk_num:
+        print(f"Resuming after {start_chunk_num} committed chunks at byte {start_offset:,}")
+
+    reader = CsvByteChunkReader(csv_file_path, chunk_bytes=chunk_bytes, start_offset=start_offset)
+
+    def commit(chunk_num: int, rows: int, files: Optional[List[str]]) -> None:
+        start, end = reader.ranges[chunk_num - start_chunk_num]
+        manifest.commit(chunk_num, start, end, files=files or [], rows=rows)
+
+    stats = stream_left_join(chunks=reader, lookup=lookup, write_part=write_part, queue_size=queue_size,
+                             start_chunk_num=start_chunk_num, on_part_written=commit)
+    stats["skipped_chunks"] = start_chunk_num
+    stats["total_rows"] = manifest.committed_rows()
+    return stats
@@ -0,0 +1,105 @@
+import argparse
+import threading
+import time
+from typing import List
+
+from logger import ConcurrentProcessManager, ProcessManager
+
+
+class GlobalLockProcessManager(ProcessManager):
+    """Baseline: the plain manager behind one lock."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+
+    def start(self, pid: int) -> None:
+        with self._lock:
+            super().start(pid)
+
+    def end(self, pid: int) -> None:
+        with self._lock:
+            super().end(pid)
+
+    def poll_all_ready(self, poll_time: float = None) -> list:
+        with self._lock:
+            return super().poll_all_ready(poll_time=poll_time)
+
+
+MANAGERS = {
+    "global-lock": GlobalLockProcessManager,
+    "striped": ConcurrentProcessManager,
+}
+
+
+def run_stress(manager: ProcessManager, producers: int, processes_per_producer: int, window: int = 64) -> dict:
+    """
+    producers threads start processes and end them `window` starts later in shuffled order, one
+    consumer thread drains with poll_all_ready until every process came out. Checks that nothing is
+    lost or returned twice and that every producer's processes come out in its own start order.
+    """
+    total = producers * processes_per_producer
+    polled: List[int] = []
+    errors = []
+
+    def produce(producer: int):
+        try:
+            base = producer * processes_per_producer
+            running = []
+            for n in range(processes_per_producer):
+                manager.start(base + n)
+                running.append(base + n)
+                if len(running) == window:
+                    for pid in reversed(running):
+                        manager.end(pid)
+                    running = []
+            for pid in running:
+                manager.end(pid)
+        except Exception as e:
+            errors.append(e)
+
+    def consume():
+        while len(polled) < total and not errors:
+            ready = manager.poll_all_ready()
+            if ready:
+                polled.extend(process.get_pid() for process in ready)
+            else:
+                time.sleep(0)
+
+    threads = [threading.Thread(target=produce, args=(producer,)) for producer in range(producers)]
+    consumer = threading.Thread(target=consume)
+    started = time.perf_counter()
+    consumer.start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    consumer.join()
+    elapsed = time.perf_counter() - started
+
+    if errors:
+        raise errors[0]
+    assert len(polled) == total and len(set(polled)) == total, "processes lost or polled twice"
+    last_seen = {}
+    for pid in polled:
+        producer = pid // processes_per_producer
+        assert last_seen.get(producer, -1) < pid, f"producer {producer} polled out of start order"
+        last_seen[producer] = pid
+    return {"producers": producers, "processes": total, "seconds": elapsed,
+            "events_per_sec": 3 * total / elapsed}  # start + end + poll
+
+
+def main():
+    parser = argparse.ArgumentParser(description="multi threaded start/end/poll stress benchmark")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--processes", type=int, default=200_000, help="processes per producer thread")
+    args = parser.parse_args()
+
+    for name, manager_class in MANAGERS.items():
+        for producers in args.threads:
+            result = run_stress(manager_class(), producers, args.processes)
+            print(f"{name:>12} | {producers:>2} producers | {result['processes']:>10,} processes | "
+                  f"{result['seconds']:6.2f}s | {result['events_per_sec']:>12,.0f} events/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
+from array import array
 from enum import Enum
+import itertools
+import threading
 import time
-from typing import Optional
+from typing import Callable, List, Optional
 
 class ProcessState(Enum):
     RUNNING = 1
@@ -9,123 +12,370 @@ class ProcessState(Enum):
     def __str__(self):
         return super().__str__()
 
+class ProcessRecords:
+    """
+    Columns of `size` process records: pid (int64), start/end time (float64) and state (int8,
+    a ProcessState value, 0 while the record is empty) - 25 bytes per process instead of a python
+    object with a __dict__. state is written last, so a reader that sees it sees the other columns.
+    """
+    __slots__ = ("pid", "start_time", "end_time", "state")
+
+    def __init__(self, size: int):
+        self.pid = array("q", bytes(8 * size))
+        self.start_time = array("d", bytes(8 * size))
+        self.end_time = array("d", bytes(8 * size))
+        self.state = array("b", bytes(size))
+
+    def start(self, offset: int, pid: int) -> None:
+        self.pid[offset] = pid
+        self.start_time[offset] = time.time()
+        self.state[offset] = ProcessState.RUNNING.value
+
+    def end(self, offset: int) -> None:
+        self.end_time[offset] = time.time()
+        self.state[offset] = ProcessState.KILLED.value
+
+
 class Process:
+    """
+    View on one record of a ProcessRecords, the manager hands these out and stores nothing per
+    process but the columns. Process(pid) alone gets a store of its own.
+    """
+    __slots__ = ("_records", "_offset")
+
     def __init__(self, pid: int):
-        self.pid = int(pid)
-        self.start_time = None
-        self.end_time = None
-        self.state = None
+        self._records = ProcessRecords(1)
+        self._offset = 0
+        self._records.pid[0] = int(pid)
+
+    @classmethod
+    def view(cls, records: ProcessRecords, offset: int) -> "Process":
+        process = cls.__new__(cls)
+        process._records = records
+        process._offset = offset
+        return process
+
+    @property
+    def pid(self) -> int:
+        return self._records.pid[self._offset]
+
+    @property
+    def state(self) -> Optional[ProcessState]:
+        state = self._records.state[self._offset]
+        return ProcessState(state) if state else None
+
+    @property
+    def start_time(self) -> Optional[float]:
+        return self._records.start_time[self._offset] if self.state is not None else None
+
+    @property
+    def end_time(self) -> Optional[float]:
+        return self._records.end_time[self._offset] if self.is_killed() else None
 
     def __str__(self):
-        return f"pid: {self.pid}, state: {print(self.state)}, start_time: {self.get_start_time()}, end_time: {self.get_end_time()}"
-    
+        return f"pid: {self.pid}, state: {self.state}, start_time: {self.get_start_time()}, end_time: {self.get_end_time()}"
+
+    def __repr__(self):
+        return f"Process({self})"
+
     def get_pid(self) -> int:
         return self.pid
-    
+
     def start(self) -> int:
-        self.start_time = time.time()
-        self.state = ProcessState.RUNNING
+        self._records.start(self._offset, self.pid)
         return 0
 
     def end(self) -> int:
-        self.end_time = time.time()
-        self.state = ProcessState.KILLED
+        self._records.end(self._offset)
         return 0
-    
+
     def is_running(self) -> int:
-        return self.state == ProcessState.RUNNING
-    
+        return self._records.state[self._offset] == ProcessState.RUNNING.value
+
     def is_killed(self) -> int:
-        return self.state == ProcessState.KILLED
-    
+        return self._records.state[self._offset] == ProcessState.KILLED.value
+
     def get_end_time(self) -> Optional[float]:
         return self.end_time
-    
+
     def get_start_time(self) -> float:
         return self.start_time
 
 
+class SlotTable:
+    """
+    Open addressing hash set of slots keyed by the pid in their record: one int64 array of slots,
+    the pid of a slot is read back from the columns through pid_of, so an entry is 8 bytes and the
+    table is kept between 1/3 and 2/3 full as it grows - 12 to 24 bytes per tracked process instead
+    of a dict entry plus the two int objects it points to. Linear probing from a fibonacci hash of
+    the pid, deleted entries stay tombstones until the next resize. Not thread safe, the owner locks it.
+    """
+    __slots__ = ("_pid_of", "_slots", "_shift", "_live", "_used")
+    EMPTY = -1
+    DELETED = -2
+    MIN_SIZE = 8
+
+    def __init__(self, pid_of: Callable[[int], int]):
+        self._pid_of = pid_of
+        self._resize(self.MIN_SIZE)
+
+    def __len__(self) -> int:
+        return self._live
+
+    def _resize(self, size: int) -> None:
+        old = getattr(self, "_slots", ())
+        self._slots = array("q", [self.EMPTY]) * size
+        self._shift = 64 - (size.bit_length() - 1)
+        self._live = self._used = 0
+        for slot in old:
+            if slot >= 0:
+                self._insert(self._pid_of(slot), slot)
+
+    def _find(self, pid: int) -> int:
+        """Position of pid in _slots, or -1 - the position to insert it at if it is not in the table."""
+        slots, mask, pid_of = self._slots, len(self._slots) - 1, self._pid_of
+        position = ((hash(pid) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> self._shift
+        free = -1
+        while True:
+            slot = slots[position]
+            if slot >= 0:
+                if pid_of(slot) == pid:
+                    return position
+            elif slot == self.EMPTY:
+                return -1 - (position if free < 0 else free)
+            elif free < 0:
+                free = position
+            position = (position + 1) & mask
+
+    def _insert(self, pid: int, slot: int) -> None:
+        slots, mask = self._slots, len(self._slots) - 1
+        position = ((hash(pid) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> self._shift
+        while slots[position] >= 0:
+            position = (position + 1) & mask
+        if slots[position] == self.EMPTY:
+            self._used += 1
+        slots[position] = slot
+        self._live += 1
+
+    def get(self, pid: int) -> Optional[int]:
+        position = self._find(pid)
+        return self._slots[position] if position >= 0 else None
+
+    def put(self, pid: int, slot: int) -> None:
+        """slot becomes the slot of pid, replacing the one it had."""
+        position = self._find(pid)
+        if position >= 0:
+            self._slots[position] = slot
+            return
+        if 3 * (self._used + 1) > 2 * len(self._slots):
+            size = self.MIN_SIZE
+            while 2 * (self._live + 1) > size:
+                size *= 2
+            self._resize(size)
+            self._insert(pid, slot)
+            return
+        position = -1 - position
+        if self._slots[position] == self.EMPTY:
+            self._used += 1
+        self._slots[position] = slot
+        self._live += 1
+
+    def remove(self, pid: int, slot: int) -> None:
+        """Drops pid if slot is still its slot."""
+        position = self._find(pid)
+        if position >= 0 and self._slots[position] == slot:
+            self._slots[position] = self.DELETED
+            self._live -= 1
+
 
 class ProcessManager:
-    def __init__(self):
+    """
+    Processes are kept in start order in fixed size segments (segment number -> ProcessRecords of
+    segment_size records), a SlotTable finds the slot (start order number) of a pid, so
+    start/end/poll are O(1) and a tracked process costs its 25 bytes of columns plus 12 to 24
+    bytes of table.
+
+    poll returns the oldest process once it has ended (start order, not end order), the cursor is
+    the slot of the next process to return. When the cursor leaves a segment the whole segment is
+    dropped, so memory is bounded by the processes that are still waiting to be returned. A polled
+    Process is a view on its segment and keeps it alive as long as the caller holds it.
+    """
+    SEGMENT_SIZE = 4096
+
+    def __init__(self, segment_size: int = SEGMENT_SIZE):
         """
         TODO: Write a logic to generate a unique PID whenever a process requests ID
         """
-        self.process_map = dict()
-        self.all_processes = list()
+        self.pid_tables = [SlotTable(self._pid_of)]  # pid -> slot, hash(pid) % len picks the table
+        self.segments = dict()  # slot // segment_size -> ProcessRecords
+        self.segment_size = segment_size
+        self._next_slot = 0
         self._cursor = 0 # can be manged via a special class
 
     def _get_process_count(self) -> int:
-        return len(self.all_processes)
-    
-    def _add_process_to_pool(self, process: Process) -> None:
-        self.all_processes.append(process)
+        """Processes started and not returned by poll yet."""
+        return self._next_slot - self._cursor
+
+    def _allocate_slot(self) -> int:
+        slot = self._next_slot
+        self._next_slot += 1
+        return slot
+
+    def _new_segment(self, segment_num: int) -> ProcessRecords:
+        segment = self.segments.get(segment_num)
+        if segment is None:
+            segment = self.segments.setdefault(segment_num, ProcessRecords(self.segment_size))
+        return segment
 
-    def _is_running(self, pid: int) -> bool:...
+    def _add_process_to_pool(self, pid: int) -> int:
+        slot = self._allocate_slot()
+        segment = self.segments.get(slot // self.segment_size) or self._new_segment(slot // self.segment_size)
+        segment.start(slot % self.segment_size, pid)
+        return slot
+
+    def _is_running(self, pid: int) -> bool:
+        idx = self._get_process_index(pid)
+        return idx is not None and self._get_process_from_idx(idx=idx).is_running()
+
+    def _pid_table(self, pid: int) -> SlotTable:
+        return self.pid_tables[hash(pid) % len(self.pid_tables)]
+
+    def _pid_of(self, slot: int) -> int:
+        return self.segments[slot // self.segment_size].pid[slot % self.segment_size]
 
     def _get_process_index(self, pid: int) -> Optional[int]:
-        return self.process_map.get(pid)
-    
+        return self._pid_table(pid).get(pid)
+
     def _end(self, idx: int) -> None:
-        process = self._get_process_from_idx(idx=idx)
-        process.end()
-        self._update_process_at_idx(idx=idx, process=process)
+        self.segments[idx // self.segment_size].end(idx % self.segment_size)
 
-    def _is_empty(self) -> bool: ...
+    def _is_empty(self) -> bool:
+        return self._cursor_at_end()
 
     def _get_cursor_idx(self) -> int:
         return self._cursor
-    
+
+    def _forget(self, pid: int, idx: int) -> None:
+        # the pid may have been started again since, then the table points to the newer slot
+        self._pid_table(pid).remove(pid, idx)
+
     def _move_cursor_to_next(self):
+        idx = self._cursor
+        self._forget(self.segments[idx // self.segment_size].pid[idx % self.segment_size], idx)
         self._cursor += 1
+        if self._cursor % self.segment_size == 0:
+            # every process of the segment was returned, drop it in one go
+            del self.segments[idx // self.segment_size]
 
     def _cursor_at_end(self) -> bool:
-        return self._get_cursor_idx() == len(self.all_processes)
-    
-    def _update_process_at_idx(self, idx: int, process: Process):
-        self.all_processes[idx] = process
+        return self._get_process_from_idx(idx=self._get_cursor_idx()) is None
+
+    def _get_process_from_idx(self, idx: int) -> Optional[Process]:
+        segment = self.segments.get(idx // self.segment_size)
+        if segment is None or not segment.state[idx % self.segment_size]:
+            return None
+        return Process.view(segment, idx % self.segment_size)
 
-    def _get_process_from_idx(self, idx: int) -> Process:
-        return self.all_processes[idx]
+    def _head_ready(self, poll_time: float) -> bool:
+        # straight on the columns, no Process view for a head that is still running
+        idx = self._get_cursor_idx()
+        segment = self.segments.get(idx // self.segment_size)
+        offset = idx % self.segment_size
+        return (segment is not None and segment.state[offset] == ProcessState.KILLED.value
+                and segment.end_time[offset] <= poll_time)
 
     def start(self, pid: int) -> None:
         """
-        TODO: validations such as
-            1. if already running -> can be ignored or raised error
-            2. if killed -> flow can be discussed and decided
+        A pid can be started again once it has ended, starting a running pid is an error.
         """
-        _process = Process(pid=pid)
-        _process.start()
-        self.process_map[pid] = self._get_process_count()
-        self._add_process_to_pool(_process)
-    
+        if self._is_running(pid):
+            raise ValueError(f"process {pid} is already running")
+        pid = int(pid)
+        self._pid_table(pid).put(pid, self._add_process_to_pool(pid))
+
     def end(self, pid: int) -> None:
-        """
-        TODO:
-            1. cleanup logic from list and map -> probably bucketing is one of the efficient way
-        """
         idx = self._get_process_index(pid)
+        if idx is None:
+            raise ValueError(f"unknown process {pid}")
         self._end(idx=idx)
 
-    def poll(self, poll_time: int = None) -> Optional[Process]:
+    def poll(self, poll_time: float = None) -> Optional[Process]:
+        """Oldest started process if it has ended by poll_time, None while it is still running."""
         if poll_time is None:
             poll_time = time.time()
-        if self._cursor_at_end():
+        if not self._head_ready(poll_time):
             return None
-        
-        idx = self._get_cursor_idx()
 
-        process = self._get_process_from_idx(idx=idx)
+        process = self._get_process_from_idx(idx=self._get_cursor_idx())
+        self._move_cursor_to_next()
+        return process
 
-        if process.is_killed():
+    def poll_all_ready(self, poll_time: float = None) -> List[Process]:
+        """Everything poll would return one by one right now, in start order."""
+        if poll_time is None:
+            poll_time = time.time()
+        ready = []
+        while self._head_ready(poll_time):
+            ready.append(self._get_process_from_idx(idx=self._get_cursor_idx()))
             self._move_cursor_to_next()
-            # TODO: check this race condition in multi threaded environment
-            # if process.get_end_time() <= poll_time: 
-            #     return self.poll(poll_time=poll_time)
-        return process
-        
-        
+        return ready
+
+
+class ConcurrentProcessManager(ProcessManager):
+    """
+    ProcessManager for many producer threads calling start/end and consumers calling poll.
 
+    - start/end of a pid hold the lock of its stripe (pid % stripes), which also guards the stripe's
+      own SlotTable, so different pids don't wait on each other; the check-then-act sequences of one
+      pid (already running? which slot?) are atomic
+    - slots come from itertools.count, the next() of which is atomic, there is no global start lock
+    - a record is written to its slot (state last) before the pid is published in its SlotTable, poll
+      sees an allocated but not yet written slot as not ready
+    - the segment table is only locked to create a segment, once per segment_size starts
+    - poll / poll_all_ready are serialized by their own lock, producers never take it
 
+    Lock order is poll lock -> stripe lock -> segment lock.
+    """
+    STRIPES = 64
+
+    def __init__(self, segment_size: int = ProcessManager.SEGMENT_SIZE, stripes: int = STRIPES):
+        super().__init__(segment_size=segment_size)
+        self._slots = itertools.count()
+        self._stripe_locks = [threading.Lock() for _ in range(stripes)]
+        self.pid_tables = [SlotTable(self._pid_of) for _ in range(stripes)]
+        self._segment_lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+
+    def _stripe_lock(self, pid: int) -> threading.Lock:
+        return self._stripe_locks[hash(pid) % len(self._stripe_locks)]
+
+    def _get_process_count(self) -> int:
+        """Processes started and not returned by poll yet (a snapshot, producers keep going)."""
+        return sum(len(table) for table in self.pid_tables)
+
+    def _allocate_slot(self) -> int:
+        return next(self._slots)
+
+    def _new_segment(self, segment_num: int) -> ProcessRecords:
+        with self._segment_lock:
+            return super()._new_segment(segment_num)
+
+    def _forget(self, pid: int, idx: int) -> None:
+        with self._stripe_lock(pid):
+            super()._forget(pid, idx)
+
+    def start(self, pid: int) -> None:
+        with self._stripe_lock(pid):
+            super().start(pid)
+
+    def end(self, pid: int) -> None:
+        with self._stripe_lock(pid):
+            super().end(pid)
 
+    def poll(self, poll_time: float = None) -> Optional[Process]:
+        with self._poll_lock:
+            return super().poll(poll_time=poll_time)
 
+    def poll_all_ready(self, poll_time: float = None) -> List[Process]:
+        with self._poll_lock:
+            return super().poll_all_ready(poll_time=poll_time)
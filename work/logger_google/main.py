@@ -1,5 +1,4 @@
 import time
-import sys
 # print(sys.path)
 
 from logger import ProcessManager
@@ -38,8 +37,20 @@ def do_basic_operations():
 
         # TODO
 
+    def drain_after_out_of_order_ends():
+        process_manager = ProcessManager()
+        for pid in range(1, 6):
+            process_manager.start(pid=pid)
+        for pid in (3, 5, 2):
+            process_manager.end(pid)
+        print(f"ready before pid 1 ended: {process_manager.poll_all_ready()}")
+        process_manager.end(1)
+        for process in process_manager.poll_all_ready():
+            print(f"drained process:: {process}")
+
     # no_process_added()
     two_process_ended_in_same_order()
+    drain_after_out_of_order_ends()
 
 
 
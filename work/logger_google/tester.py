@@ -1,5 +1,9 @@
+import threading
 import unittest
 
+from benchmark import run_stress
+from logger import ConcurrentProcessManager
+
 
 class TestRaceCondition(unittest.TestCase):
     def test(self):
@@ -17,9 +21,35 @@ class Test(unittest.TestCase):
         6. no process added logic
            
     """
-    def testRaceCondition(self):...
+    def testRaceCondition(self):
+        # every thread starts and ends the same pids, the stripe lock makes "already running?" atomic
+        manager = ConcurrentProcessManager(segment_size=16)
+        started = []
+
+        def start_all():
+            for pid in range(500):
+                try:
+                    manager.start(pid)
+                    started.append(pid)
+                except ValueError:
+                    pass
+
+        threads = [threading.Thread(target=start_all) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(started), list(range(500)))
+
+        for pid in range(500):
+            manager.end(pid)
+        polled = [process.get_pid() for process in manager.poll_all_ready()]
+        self.assertEqual(sorted(polled), list(range(500)))
+        self.assertEqual(manager._get_process_count(), 0)
 
-    def testMultiThreadedEvn(self):...
+    def testMultiThreadedEvn(self):
+        result = run_stress(ConcurrentProcessManager(segment_size=64), producers=8, processes_per_producer=5_000)
+        self.assertEqual(result["processes"], 40_000)
 
 unittest.main()
 # obj = TestRaceCondition()
@@ -0,0 +1,136 @@
+import json
+import os
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+
+
+PART_NUMBER = re.compile(r"^part-(\d+)")
+
+
+def file_crc32(path: str, block_size: int = 8 * 1024 * 1024) -> int:
+    crc = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            crc = zlib.crc32(block, crc)
+    return crc
+
+
+def atomic_write_text(path: str, text: str) -> None:
+    """tmp file + fsync + rename, readers see the old or the new content, never half of it."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class CheckpointManifest:
+    """
+    _manifest.json in the output directory of a chunked job:
+        {"job": {...}, "chunks": {"<chunk_num>": {"start", "end", "rows", "files": [{"path", "size", "crc32"}]}}}
+
+    A chunk is committed only after its part files are completely written, and the manifest is
+    rewritten atomically on every commit, so after a crash the manifest lists exactly the chunks whose
+    outputs are complete. `job` describes the input and the chunking (path, size, mtime, chunk size ...),
+    a manifest written for another job is ignored and the job starts over.
+    Part files are expected to be named part-<chunk_num>..., that's how partial outputs are found.
+    """
+    FILE_NAME = "_manifest.json"
+
+    def __init__(self, output_dir: str, job: dict):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, self.FILE_NAME)
+        self.job = job
+        self.chunks: Dict[int, dict] = {}
+        self._lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r") as f:
+            manifest = json.load(f)
+        if manifest.get("job") != self.job:
+            print(f"[CheckpointManifest] {self.path} belongs to another job, starting from scratch")
+            return
+        self.chunks = {int(chunk_num): entry for chunk_num, entry in manifest["chunks"].items()}
+
+    def _save(self) -> None:
+        manifest = {"job": self.job, "chunks": {str(n): entry for n, entry in sorted(self.chunks.items())}}
+        atomic_write_text(self.path, json.dumps(manifest))
+
+    def commit(self, chunk_num: int, start: int, end: int, files: List[str], rows: int,
+               checksum: bool = True) -> None:
+        """Record a finished chunk, files are paths of its (already complete) part files."""
+        entry = {
+            "start": start,
+            "end": end,
+            "rows": rows,
+            "files": [
+                {
+                    "path": os.path.relpath(path, self.output_dir),
+                    "size": os.path.getsize(path),
+                    "crc32": file_crc32(path) if checksum else None,
+                }
+                for path in files
+            ],
+        }
+        with self._lock:
+            self.chunks[chunk_num] = entry
+            self._save()
+
+    def verify(self, chunk_num: int, check_crc: bool = False) -> bool:
+        """Part files of the chunk are still there with the committed size (and checksum)."""
+        entry = self.chunks.get(chunk_num)
+        if entry is None:
+            return False
+        for part in entry["files"]:
+            path = os.path.join(self.output_dir, part["path"])
+            if not os.path.exists(path) or os.path.getsize(path) != part["size"]:
+                return False
+            if check_crc and part["crc32"] is not None and file_crc32(path) != part["crc32"]:
+                return False
+        return True
+
+    def committed_chunks(self, ranges: Optional[List[Tuple[int, int]]] = None, check_crc: bool = False) -> Set[int]:
+        """
+        Chunks that can be skipped on resume: committed, verified and, when the expected
+        (start, end) ranges are given, covering the same bytes.
+        """
+        done = set()
+        for chunk_num, entry in self.chunks.items():
+            if ranges is not None and (chunk_num >= len(ranges) or tuple(ranges[chunk_num]) != (entry["start"], entry["end"])):
+                continue
+            if self.verify(chunk_num, check_crc=check_crc):
+                done.add(chunk_num)
+        return done
+
+    def resume_point(self, check_crc: bool = False) -> Tuple[int, Optional[int]]:
+        """
+        For sequential readers: (first chunk to process, byte offset to continue from) after the longest
+        run of verified chunks 0..n-1. (0, None) when nothing can be reused.
+        """
+        chunk_num = 0
+        offset = None
+        while chunk_num in self.chunks and self.verify(chunk_num, check_crc=check_crc):
+            offset = self.chunks[chunk_num]["end"]
+            chunk_num += 1
+        return chunk_num, offset
+
+    def discard_uncommitted(self, keep: Set[int]) -> None:
+        """Drop manifest entries outside keep and delete their part files and any *.tmp leftovers."""
+        with self._lock:
+            self.chunks = {chunk_num: entry for chunk_num, entry in self.chunks.items() if chunk_num in keep}
+            self._save()
+        for root, _, files in os.walk(self.output_dir):
+            for name in files:
+                match = PART_NUMBER.match(name)
+                if name.endswith(".tmp") or (match and int(match.group(1)) not in keep):
+                    os.remove(os.path.join(root, name))
+
+    def committed_rows(self) -> int:
+        return sum(entry["rows"] for entry in self.chunks.values())
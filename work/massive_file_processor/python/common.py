@@ -1,8 +1,220 @@
-class FileProcessor:
-    def __init__(self):
-        pass
-
-    @static_method
-    def process_file()
-    
-    
\ No newline at end of file
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from work.massive_file_processor.python.checkpoint import CheckpointManifest
+
+
+def _process_chunk(processor: "FileProcessor", start: int, end: int, func: Callable[[Any], Any]) -> Tuple[List[Any], int]:
+    """Runs inside a worker: read the chunk, parse its records and apply func to each of them."""
+    with open(processor.path, "rb") as file:
+        file.seek(start)
+        data = file.read(end - start)
+    return [func(record) for record in processor.iter_records(data)], end - start
+
+
+def _process_chunk_to_part(processor: "FileProcessor", start: int, end: int, func: Callable[[Any], Any],
+                           part_path: str) -> Tuple[int, int]:
+    """Runs inside a worker: like _process_chunk, but the results go to a part file written atomically."""
+    results, chunk_bytes = _process_chunk(processor, start, end, func)
+    tmp_path = part_path + ".tmp"
+    with open(tmp_path, "w") as file:
+        processor.write_results(results, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, part_path)
+    return len(results), chunk_bytes
+
+
+class FileProcessor(ABC):
+    """
+    Applies a custom function to every record of a very large file with a process pool.
+
+    1. split_chunks cuts the file into ~chunk_size byte ranges that start and end on record boundaries
+    2. every range is read, parsed (iter_records) and mapped by a worker, only offsets are sent to it
+    3. results come back per chunk, in input order (ordered=True) or as soon as they are ready
+
+    At most max_in_flight chunks are submitted at a time, so memory stays bounded by
+    ~max_in_flight * chunk_size whatever the file size. Subclasses only describe the record format.
+    """
+    def __init__(self, path: str, chunk_size: int = 64 * 1024 * 1024, workers: Optional[int] = None,
+                 ordered: bool = True, max_in_flight: Optional[int] = None, log_every: int = 10):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.workers = workers or os.cpu_count() or 1
+        self.ordered = ordered
+        self.max_in_flight = max_in_flight or 2 * self.workers
+        self.log_every = log_every
+        self.stats = {}
+
+    def __getstate__(self):
+        # workers only need the record format, not the run stats
+        state = self.__dict__.copy()
+        state["stats"] = {}
+        return state
+
+    @abstractmethod
+    def iter_records(self, data: bytes) -> Iterator[Any]:
+        """Parse the records of a record aligned chunk of the file."""
+
+    def data_start(self) -> int:
+        """Offset of the first record, subclasses with a header skip it here."""
+        return 0
+
+    def next_record_start(self, file, offset: int) -> int:
+        """First record boundary at or after offset, default: the byte after the next newline."""
+        file.seek(offset)
+        file.readline()
+        return file.tell()
+
+    def split_chunks(self) -> List[Tuple[int, int]]:
+        file_size = os.path.getsize(self.path)
+        chunks = []
+        with open(self.path, "rb") as file:
+            start = self.data_start()
+            while start < file_size:
+                end = start + self.chunk_size
+                if end >= file_size:
+                    end = file_size
+                else:
+                    # the boundary search starts one byte early so a chunk ending right on a newline is kept
+                    end = self.next_record_start(file, end - 1)
+                chunks.append((start, end))
+                start = end
+        return chunks
+
+    def write_results(self, results: List[Any], file) -> None:
+        """Part file format of process_file_to_parts, one json document per result by default."""
+        file.writelines(json.dumps(result, default=str) + "\n" for result in results)
+
+    def job_description(self, func: Optional[Callable[[Any], Any]] = None) -> dict:
+        """What a checkpoint is valid for: same input bytes, record format, chunking and function."""
+        stat = os.stat(self.path)
+        description = {
+            "path": os.path.abspath(self.path),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "processor": self.__class__.__name__,
+            "chunk_size": self.chunk_size,
+        }
+        if func is not None:
+            description["func"] = f"{getattr(func, '__module__', None)}.{getattr(func, '__qualname__', repr(func))}"
+        return description
+
+    def _run_bounded(self, executor: ProcessPoolExecutor, tasks: Iterable[tuple],
+                     submit: Callable[[tuple], Any]) -> Iterator[Tuple[tuple, Any]]:
+        """
+        Submit tasks keeping at most max_in_flight pending, yield (task, result) in task order
+        (ordered=True) or as they complete.
+        """
+        tasks = iter(tasks)
+        in_flight = deque()
+
+        def submit_more():
+            while len(in_flight) < self.max_in_flight:
+                task = next(tasks, None)
+                if task is None:
+                    return
+                in_flight.append((task, submit(task)))
+
+        submit_more()
+        while in_flight:
+            if self.ordered:
+                done = [in_flight.popleft()]
+            else:
+                finished, _ = wait([future for _, future in in_flight], return_when=FIRST_COMPLETED)
+                done = [item for item in in_flight if item[1] in finished]
+                for item in done:
+                    in_flight.remove(item)
+
+            for task, future in done:
+                result = future.result()
+                submit_more()  # keep the workers busy while the caller consumes results
+                yield task, result
+
+    def _update_stats(self, chunks_done: int, records: int, bytes_done: int, start_time: float) -> None:
+        elapsed = time.time() - start_time
+        self.stats = {
+            "chunks": chunks_done,
+            "records": records,
+            "bytes": bytes_done,
+            "seconds": elapsed,
+            "records_per_sec": records / elapsed if elapsed else 0.0,
+            "mb_per_sec": bytes_done / (1024 * 1024) / elapsed if elapsed else 0.0,
+        }
+
+    def process_file(self, func: Callable[[Any], Any]) -> Iterator[Any]:
+        """
+        Yield func(record) for every record of the file. func must be picklable (a module level
+        function), it runs in the worker processes.
+        """
+        start_time = time.time()
+        chunks_done = records = bytes_done = 0
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            def submit(chunk):
+                return executor.submit(_process_chunk, self, chunk[0], chunk[1], func)
+
+            for _, (results, chunk_bytes) in self._run_bounded(executor, self.split_chunks(), submit):
+                yield from results
+
+                chunks_done += 1
+                records += len(results)
+                bytes_done += chunk_bytes
+                self._log_progress(chunks_done, records, bytes_done, start_time)
+
+        self._log_done(chunks_done, records, bytes_done, start_time)
+
+    def process_file_to_parts(self, func: Callable[[Any], Any], output_dir: str, resume: bool = True,
+                              check_crc: bool = False) -> dict:
+        """
+        Checkpointed variant of process_file for long jobs: the results of chunk n are written by the
+        worker to output_dir/part-<n>.jsonl (see write_results) and committed in output_dir/_manifest.json.
+
+        With resume=True a restarted job skips the chunks whose committed part files are still intact
+        (size, and crc32 with check_crc=True), deletes partial outputs of the others and redoes them.
+        With resume=False everything is recomputed.
+        """
+        chunks = self.split_chunks()
+        manifest = CheckpointManifest(output_dir, job=self.job_description(func))
+        done = manifest.committed_chunks(ranges=chunks, check_crc=check_crc) if resume else set()
+        manifest.discard_uncommitted(keep=done)
+        if done:
+            print(f"[{self.__class__.__name__}] resuming, {len(done)}/{len(chunks)} chunks already committed")
+
+        start_time = time.time()
+        chunks_done = records = bytes_done = 0
+        todo = [(chunk_num, start, end) for chunk_num, (start, end) in enumerate(chunks) if chunk_num not in done]
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            def submit(task):
+                chunk_num, start, end = task
+                part_path = os.path.join(output_dir, f"part-{chunk_num:05d}.jsonl")
+                return executor.submit(_process_chunk_to_part, self, start, end, func, part_path)
+
+            for (chunk_num, start, end), (rows, chunk_bytes) in self._run_bounded(executor, todo, submit):
+                part_path = os.path.join(output_dir, f"part-{chunk_num:05d}.jsonl")
+                manifest.commit(chunk_num, start, end, files=[part_path], rows=rows)
+
+                chunks_done += 1
+                records += rows
+                bytes_done += chunk_bytes
+                self._log_progress(chunks_done, records, bytes_done, start_time)
+
+        self._log_done(chunks_done, records, bytes_done, start_time)
+        return {**self.stats, "skipped_chunks": len(done), "total_records": manifest.committed_rows()}
+
+    def _log_progress(self, chunks_done: int, records: int, bytes_done: int, start_time: float) -> None:
+        self._update_stats(chunks_done, records, bytes_done, start_time)
+        if self.log_every and chunks_done % self.log_every == 0:
+            print(f"[{self.__class__.__name__}] {chunks_done} chunks, {records:,} records, "
+                  f"{self.stats['records_per_sec']:,.0f} records/s, {self.stats['mb_per_sec']:,.1f} MB/s")
+
+    def _log_done(self, chunks_done: int, records: int, bytes_done: int, start_time: float) -> None:
+        self._update_stats(chunks_done, records, bytes_done, start_time)
+        print(f"[{self.__class__.__name__}] done: {records:,} records in {self.stats['seconds']:.2f}s, "
+              f"{self.stats['records_per_sec']:,.0f} records/s")
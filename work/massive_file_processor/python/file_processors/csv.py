@@ -0,0 +1,81 @@
+import csv
+import io
+from typing import Iterator, List, Optional, Union
+
+from work.massive_file_processor.python.common import FileProcessor
+
+
+NEWLINE = b"\n"
+QUOTE = b'"'
+
+
+class CsvFileProcessor(FileProcessor):
+    """
+    One record per csv row, as a list of fields or a dict keyed by the header (as_dict=True).
+
+    Chunks are cut at newlines by default. quoted_newlines=True makes split_chunks track the quote
+    parity of the whole file first (one fast sequential pass with bytes.split), so chunks are only cut
+    at newlines outside of quoted fields.
+    """
+    def __init__(self, path: str, header: bool = True, as_dict: bool = False, quoted_newlines: bool = False,
+                 encoding: str = "utf-8", **kwargs):
+        super().__init__(path, **kwargs)
+        self.header = header
+        self.as_dict = as_dict
+        self.quoted_newlines = quoted_newlines
+        self.encoding = encoding
+        self.columns: Optional[List[str]] = None
+        self._data_start = 0
+        if header:
+            with open(path, "rb") as file:
+                header_line = file.readline()
+            self._data_start = len(header_line)
+            self.columns = next(csv.reader([header_line.decode(encoding)]), [])
+
+    def data_start(self) -> int:
+        return self._data_start
+
+    def split_chunks(self):
+        if not self.quoted_newlines:
+            return super().split_chunks()
+        return self._split_chunks_outside_quotes()
+
+    def _split_chunks_outside_quotes(self, block_size: int = 8 * 1024 * 1024):
+        chunks = []
+        start = self.data_start()
+        target = start + self.chunk_size
+        parity = 0
+        with open(self.path, "rb") as file:
+            file.seek(start)
+            offset = start
+            while True:
+                block = file.read(block_size)
+                if not block:
+                    break
+                if offset + len(block) > target:
+                    # walk the quoted/unquoted segments of this block looking for cut points
+                    segment_start = offset
+                    for i, segment in enumerate(block.split(QUOTE)):
+                        if i:
+                            parity ^= 1
+                        while parity == 0:
+                            search_from = max(target, segment_start) - segment_start
+                            newline = segment.find(NEWLINE, search_from) if search_from <= len(segment) else -1
+                            if newline < 0:
+                                break
+                            end = segment_start + newline + 1
+                            chunks.append((start, end))
+                            start, target = end, end + self.chunk_size
+                        segment_start += len(segment) + 1  # +1 for the quote byte
+                else:
+                    parity ^= block.count(QUOTE) & 1
+                offset += len(block)
+        if start < offset:
+            chunks.append((start, offset))
+        return chunks
+
+    def iter_records(self, data: bytes) -> Iterator[Union[list, dict]]:
+        reader = csv.reader(io.StringIO(data.decode(self.encoding), newline=""))
+        if self.as_dict:
+            return (dict(zip(self.columns, row)) for row in reader)
+        return reader
@@ -1,13 +1,74 @@
+from typing import Any, Iterator, List, Optional
+
 import ijson
 
+try:
+    import pandas as pd
+except ImportError:  # only needed for batch_type="dataframe"
+    pd = None
+
+
+def _load_backend():
+    """ijson's C backend (yajl2_c) parses ~10x faster than the pure python one, fall back if missing."""
+    try:
+        return ijson.get_backend("yajl2_c")
+    except ImportError:
+        print(f"[JsonFileProcessor] yajl2_c backend not available, using ijson.{ijson.backend}")
+        return ijson
+
+
 class JsonFileProcessor:
-    def __init__(self, path: str):
+    """
+    Streams the items of an arbitrarily large json file in constant memory.
+
+    - json_lines=False: the items under `prefix` of a single json document, "item" is every element
+      of a top level array, "data.item" every element of {"data": [...]}.
+    - json_lines=True: every document of a JSON Lines file.
+
+    Items are yielded in batches of `batch_size` (lists, or DataFrames with batch_type="dataframe"),
+    so the caller's per item python overhead happens once per batch.
+    """
+    BATCH_TYPES = ("list", "dataframe")
+
+    def __init__(self, path: str, prefix: str = "item", json_lines: bool = False, batch_size: int = 10_000,
+                 batch_type: str = "list", columns: Optional[List[str]] = None,
+                 read_buffer_size: int = 1024 * 1024, use_float: bool = True):
+        if batch_type not in self.BATCH_TYPES:
+            raise ValueError(f"unknown batch type: {batch_type}, expected one of {self.BATCH_TYPES}")
+        if batch_type == "dataframe" and pd is None:
+            raise ImportError("batch_type='dataframe' needs pandas")
         self.path = path
+        self.prefix = prefix
+        self.json_lines = json_lines
+        self.batch_size = batch_size
+        self.batch_type = batch_type
+        self.columns = columns
+        self.read_buffer_size = read_buffer_size
+        self.use_float = use_float  # floats instead of Decimal, much cheaper to build
+        self.backend = _load_backend()
 
-    def proces(self):
-        for i in range(0,5):
-            yield i
-        pass
+    def iter_items(self, file) -> Iterator[Any]:
+        if self.json_lines:
+            return self.backend.items(file, "", multiple_values=True, use_float=self.use_float,
+                                      buf_size=self.read_buffer_size)
+        return self.backend.items(file, self.prefix, use_float=self.use_float, buf_size=self.read_buffer_size)
 
+    def _to_batch(self, items: List[Any]):
+        if self.batch_type == "dataframe":
+            return pd.DataFrame.from_records(items, columns=self.columns)
+        return items
 
+    def process(self) -> Iterator[Any]:
+        """Yield batches of at most batch_size items, only one batch is alive at a time."""
+        with open(self.path, "rb") as file:
+            batch = []
+            for item in self.iter_items(file):
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    yield self._to_batch(batch)
+                    batch = []
+            if batch:
+                yield self._to_batch(batch)
 
+    # kept for the callers of the first version
+    proces = process
@@ -0,0 +1,12 @@
+import json
+from typing import Any, Iterator
+
+from work.massive_file_processor.python.common import FileProcessor
+
+
+class JsonLinesFileProcessor(FileProcessor):
+    """One json document per line (JSON Lines), blank lines are skipped."""
+    def iter_records(self, data: bytes) -> Iterator[Any]:
+        for line in data.splitlines():
+            if line.strip():
+                yield json.loads(line)
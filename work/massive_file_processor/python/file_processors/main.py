@@ -1 +1,37 @@
-class 
\ No newline at end of file
+import argparse
+
+from work.massive_file_processor.python.file_processors.csv import CsvFileProcessor
+from work.massive_file_processor.python.file_processors.jsonl import JsonLinesFileProcessor
+from work.massive_file_processor.python.file_processors.text import TextFileProcessor
+
+
+PROCESSORS = {
+    "csv": CsvFileProcessor,
+    "jsonl": JsonLinesFileProcessor,
+    "text": TextFileProcessor,
+}
+
+
+def record_size(record) -> int:
+    """sample custom function, it runs in the worker processes so it has to live at module level"""
+    return len(record)
+
+
+def run(path: str, file_format: str, chunk_size: int, workers: int, ordered: bool) -> None:
+    processor = PROCESSORS[file_format](path, chunk_size=chunk_size, workers=workers, ordered=ordered)
+    total = 0
+    for size in processor.process_file(record_size):
+        total += size
+    print(f"total size of all records: {total:,}, stats: {processor.stats}")
+
+
+if __name__ == "__main__":
+    # run from the repo root: python -m work.massive_file_processor.python.file_processors.main <path>
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=list(PROCESSORS), default="text")
+    parser.add_argument("--chunk-size", type=int, default=64 * 1024 * 1024)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--unordered", action="store_true")
+    args = parser.parse_args()
+    run(args.path, args.format, args.chunk_size, args.workers, ordered=not args.unordered)
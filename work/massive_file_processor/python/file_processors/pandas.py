@@ -1,7 +1,143 @@
+import os
+import time
+from io import BytesIO
+from typing import Callable, Dict, Iterator, List, Optional
+
 import pandas as pd
 
-from  io import BytesIO
+from work.massive_file_processor.python.common import FileProcessor
+
+
+def _pyarrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def csv_part_writer(output_dir: str) -> Callable[[pd.DataFrame, int], None]:
+    os.makedirs(output_dir, exist_ok=True)
+
+    def write(df: pd.DataFrame, chunk_num: int) -> None:
+        df.to_csv(os.path.join(output_dir, f"part-{chunk_num:05d}.csv"), index=False)
+    return write
+
+
+def parquet_part_writer(output_dir: str) -> Callable[[pd.DataFrame, int], None]:
+    os.makedirs(output_dir, exist_ok=True)
+
+    def write(df: pd.DataFrame, chunk_num: int) -> None:
+        df.to_parquet(os.path.join(output_dir, f"part-{chunk_num:05d}.parquet"), index=False)
+    return write
+
+
+class PandasFileProcessor(FileProcessor):
+    """
+    CSV processor working on whole DataFrames instead of rows.
+
+    The file is cut into line aligned byte ranges (FileProcessor.split_chunks) and every range is parsed
+    with pd.read_csv(engine="pyarrow") - multi threaded, and the pyarrow engine has no chunksize - into
+    pyarrow backed dtypes, with explicit `dtypes` when given. The user function gets a DataFrame and
+    returns a DataFrame, so all the work stays vectorized.
+
+    chunk_size=None picks the byte size of a chunk from memory_budget: a sample of the file gives the
+    in memory size of a parsed row, and a chunk plus the function's intermediates (compute_overhead
+    times the chunk) has to fit in the budget.
+
+    run() processes the chunks in this process and reports parse / compute / write time per chunk,
+    process_file(func) (inherited) runs the same parsing + func over a process pool.
+    """
+    def __init__(self, path: str, dtypes: Optional[Dict[str, str]] = None, engine: str = "pyarrow",
+                 dtype_backend: Optional[str] = "pyarrow", memory_budget: int = 1024 * 1024 * 1024,
+                 compute_overhead: float = 3.0, sample_rows: int = 10_000, chunk_size: Optional[int] = None,
+                 encoding: str = "utf-8", **kwargs):
+        if engine == "pyarrow" and not _pyarrow_available():
+            print("[PandasFileProcessor] pyarrow is not installed, parsing with the C engine")
+            engine = "c"
+            dtype_backend = None if dtype_backend == "pyarrow" else dtype_backend
+        super().__init__(path, chunk_size=chunk_size or 64 * 1024 * 1024, **kwargs)
+        self.dtypes = dtypes
+        self.engine = engine
+        self.dtype_backend = dtype_backend
+        self.memory_budget = memory_budget
+        self.compute_overhead = compute_overhead
+        self.encoding = encoding
+        with open(path, "rb") as file:
+            self.header = file.readline()
+        if chunk_size is None:
+            self.chunk_size = self.auto_chunk_size(sample_rows=sample_rows)
+
+    def data_start(self) -> int:
+        return len(self.header)
+
+    def parse(self, data: bytes) -> pd.DataFrame:
+        kwargs = {"engine": self.engine, "dtype": self.dtypes, "encoding": self.encoding}
+        if self.dtype_backend is not None:
+            kwargs["dtype_backend"] = self.dtype_backend
+        return pd.read_csv(BytesIO(self.header + data), **kwargs)
+
+    def iter_records(self, data: bytes) -> Iterator[pd.DataFrame]:
+        # a "record" of this processor is the DataFrame of a whole chunk
+        yield self.parse(data)
+
+    def auto_chunk_size(self, sample_rows: int = 10_000) -> int:
+        """Bytes of csv per chunk so that parsed chunk * (1 + compute_overhead) fits memory_budget."""
+        with open(self.path, "rb") as file:
+            file.seek(self.data_start())
+            sample = b"".join(file.readline() for _ in range(sample_rows))
+        if not sample:
+            return 64 * 1024 * 1024
+
+        sample_df = self.parse(sample)
+        disk_bytes_per_row = len(sample) / max(len(sample_df), 1)
+        memory_bytes_per_row = sample_df.memory_usage(deep=True).sum() / max(len(sample_df), 1)
+        rows_per_chunk = self.memory_budget / (memory_bytes_per_row * (1 + self.compute_overhead))
+        chunk_size = max(int(rows_per_chunk * disk_bytes_per_row), 1024 * 1024)
+        print(f"[PandasFileProcessor] ~{memory_bytes_per_row:,.0f} bytes/row in memory, "
+              f"{disk_bytes_per_row:,.0f} bytes/row on disk -> chunks of {chunk_size / (1024 * 1024):,.0f} MB "
+              f"(~{rows_per_chunk:,.0f} rows) for a {self.memory_budget / (1024 * 1024):,.0f} MB budget")
+        return chunk_size
+
+    def run(self, func: Callable[[pd.DataFrame], pd.DataFrame],
+            write: Optional[Callable[[pd.DataFrame, int], None]] = None) -> List[dict]:
+        """
+        Parse -> func -> write every chunk in this process, with per chunk timings.
+        Returns one {"chunk", "rows", "parse_s", "compute_s", "write_s"} dict per chunk.
+        """
+        timings = []
+        with open(self.path, "rb") as file:
+            for chunk_num, (start, end) in enumerate(self.split_chunks()):
+                started = time.perf_counter()
+                file.seek(start)
+                df = self.parse(file.read(end - start))
+                parsed = time.perf_counter()
+                result = func(df)
+                computed = time.perf_counter()
+                if write is not None:
+                    write(result, chunk_num)
+                written = time.perf_counter()
+
+                timing = {
+                    "chunk": chunk_num,
+                    "rows": len(df),
+                    "parse_s": parsed - started,
+                    "compute_s": computed - parsed,
+                    "write_s": written - computed,
+                }
+                timings.append(timing)
+                if self.log_every and (chunk_num + 1) % self.log_every == 0:
+                    print(f"[PandasFileProcessor] chunk {chunk_num}: {timing['rows']:,} rows, "
+                          f"parse {timing['parse_s']:.2f}s, compute {timing['compute_s']:.2f}s, "
+                          f"write {timing['write_s']:.2f}s")
 
-pd.read_json
+        self.print_timing_summary(timings)
+        return timings
 
-with
\ No newline at end of file
+    @staticmethod
+    def print_timing_summary(timings: List[dict]) -> None:
+        rows = sum(timing["rows"] for timing in timings)
+        totals = {step: sum(timing[step] for timing in timings) for step in ("parse_s", "compute_s", "write_s")}
+        total = sum(totals.values()) or 1.0
+        print(f"[PandasFileProcessor] {len(timings)} chunks, {rows:,} rows, {rows / total:,.0f} rows/s | " +
+              ", ".join(f"{step[:-2]} {seconds:.2f}s ({seconds / total:.0%})" for step, seconds in totals.items()))
@@ -0,0 +1,13 @@
+from typing import Iterator
+
+from work.massive_file_processor.python.common import FileProcessor
+
+
+class TextFileProcessor(FileProcessor):
+    """One record per line, decoded, without the line separator."""
+    def __init__(self, path: str, encoding: str = "utf-8", **kwargs):
+        super().__init__(path, **kwargs)
+        self.encoding = encoding
+
+    def iter_records(self, data: bytes) -> Iterator[str]:
+        return iter(data.decode(self.encoding).splitlines())
@@ -0,0 +1,123 @@
+import mmap
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+
+class MmapRecordReader:
+    """
+    Read only memory map of a file, records are exposed as memoryview slices of the mapping.
+
+    Nothing is copied or decoded until the caller asks for it (decode / bytes(record)), finding the
+    separators is done by mmap.find in C. Pages that were scanned are dropped from the page tables
+    every `release_every` bytes (MADV_DONTNEED), so RSS stays flat on a 20 GB scan.
+
+    Use it as a context manager and don't keep record memoryviews after the with block: a mapping
+    can't be closed while views on it are alive.
+    """
+    def __init__(self, path: str, separator: bytes = b"\n", encoding: str = "utf-8",
+                 release_every: int = 256 * 1024 * 1024):
+        self.path = path
+        self.separator = separator
+        self.encoding = encoding
+        self.release_every = release_every
+        self._file = None
+        self._mmap = None
+        self._view = None
+
+    def __enter__(self) -> "MmapRecordReader":
+        self._file = open(self.path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        if self.size:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._mmap)
+            self._advise(getattr(mmap, "MADV_SEQUENTIAL", None), 0, self.size)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._view is not None:
+            self._view.release()
+            self._mmap.close()
+        self._file.close()
+        self._view = self._mmap = self._file = None
+
+    def _advise(self, option: Optional[int], start: int, length: int) -> None:
+        if option is None or not hasattr(self._mmap, "madvise"):
+            return  # madvise is python >= 3.8 and not available on every platform
+        aligned_start = start - start % mmap.PAGESIZE
+        self._mmap.madvise(option, aligned_start, length + start - aligned_start)
+
+    def next_record_start(self, offset: int) -> int:
+        """First record boundary at or after offset (offset itself when the byte before it is a separator)."""
+        if offset <= 0:
+            return 0
+        if offset >= self.size:
+            return self.size
+        separator_at = self._mmap.find(self.separator, offset - 1)
+        return self.size if separator_at < 0 else separator_at + len(self.separator)
+
+    def split_ranges(self, range_size: int) -> List[Tuple[int, int]]:
+        """Record aligned (start, end) ranges of ~range_size bytes covering the whole file."""
+        ranges = []
+        start = 0
+        while start < self.size:
+            end = self.next_record_start(start + range_size)
+            ranges.append((start, end))
+            start = end
+        return ranges
+
+    def iter_records(self, start: int = 0, end: Optional[int] = None) -> Iterator[memoryview]:
+        """memoryview of every record in [start, end), without the separator."""
+        if self._mmap is None:
+            return
+        end = self.size if end is None else end
+        find = self._mmap.find
+        separator_len = len(self.separator)
+        released_upto = start
+        position = start
+        while position < end:
+            separator_at = find(self.separator, position, end)
+            record_end = end if separator_at < 0 else separator_at
+            yield self._view[position:record_end]
+            position = record_end + separator_len
+
+            if self.release_every and position - released_upto >= self.release_every:
+                self._advise(getattr(mmap, "MADV_DONTNEED", None), released_upto, position - released_upto)
+                released_upto = position
+
+    def decode(self, record: memoryview) -> str:
+        return str(record, self.encoding)
+
+
+def _scan_range(path: str, start: int, end: int, separator: bytes,
+                func: Callable[[Iterator[memoryview]], Any]) -> Any:
+    """Runs in a worker: map the file and hand the records of [start, end) to func."""
+    with MmapRecordReader(path, separator=separator) as reader:
+        return func(reader.iter_records(start, end))
+
+
+def scan_file(path: str,
+              func: Callable[[Iterator[memoryview]], Any],
+              workers: Optional[int] = None,
+              range_size: int = 256 * 1024 * 1024,
+              separator: bytes = b"\n") -> List[Any]:
+    """
+    Run func over the records of every record aligned range of the file in a process pool and return
+    the per range results in file order. Workers receive (path, start, end) only and map the file
+    themselves, func (module level, picklable) gets an iterator of memoryview records and should
+    reduce them to something small, e.g. a count or a partial aggregate.
+    """
+    start_time = time.time()
+    with MmapRecordReader(path, separator=separator) as reader:
+        ranges = reader.split_ranges(range_size)
+        file_size = reader.size
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = [executor.submit(_scan_range, path, start, end, separator, func) for start, end in ranges]
+        results = [future.result() for future in futures]
+
+    elapsed = time.time() - start_time
+    print(f"[scan_file] {len(ranges)} ranges, {file_size / (1024 * 1024):,.1f} MB in {elapsed:.2f}s, "
+          f"{file_size / (1024 * 1024) / elapsed if elapsed else 0:,.1f} MB/s")
+    return results